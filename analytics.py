@@ -0,0 +1,160 @@
+import argparse
+import csv
+import os
+from datetime import date
+
+import numpy as np
+
+from event_log import event_log
+from trade_journal import TradeJournal
+
+r_bins = np.arange(-3, 5.5, 0.5)
+stat_columns = ("trades", "wins", "pnl", "r")
+
+
+def group_stats(keys: np.ndarray, trades: np.ndarray, size: int):
+  realized = trades["realized_amount"]
+  return np.column_stack([
+    np.bincount(keys, minlength=size),
+    np.bincount(keys, weights=realized > 0, minlength=size),
+    np.bincount(keys, weights=realized, minlength=size),
+    np.bincount(keys, weights=trades["realized_reward"], minlength=size)
+  ])
+
+
+def day_partial(trades: np.ndarray):
+  trades = trades[np.argsort(trades["closed"], kind="stable")]
+  symbols, symbol_index = np.unique(trades["symbol"], return_inverse=True)
+  hours = trades["opened"].astype("datetime64[h]").astype(np.int64) % 24
+  return {
+    "pnl": trades["realized_amount"],
+    "r": trades["realized_reward"],
+    "closed": trades["closed"],
+    "hold": (trades["closed"] - trades["opened"]).astype(np.int64),
+    "symbols": symbols,
+    "symbol_stats": group_stats(symbol_index, trades, len(symbols)),
+    "hour_stats": group_stats(hours, trades, 24),
+    "r_histogram": np.bincount(np.digitize(trades["realized_reward"], r_bins), minlength=len(r_bins) + 1)
+  }
+
+
+class AnalyticsCache:
+  def __init__(self, journal: TradeJournal, directory: str):
+    self.journal = journal
+    self.directory = directory
+
+  def partial_path(self, day: date):
+    return os.path.join(self.directory, f"{day.isoformat()}.npz")
+
+  def is_fresh(self, day: date):
+    path = self.partial_path(day)
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(self.journal.trades_path(day))
+
+  def partials(self, start: date = None, end: date = None):
+    days = self.journal.days(self.journal.trades_directory, start, end)
+    stale_days = [day for day in days if not self.is_fresh(day)]
+    if stale_days:
+      self.update(stale_days)
+    partials = []
+    for day in days:
+      with np.load(self.partial_path(day)) as partial:
+        partials.append({ key: partial[key] for key in partial.files })
+    return partials
+
+  def update(self, days: list[date]):
+    os.makedirs(self.directory, exist_ok=True)
+    arrays = [np.load(self.journal.trades_path(day), mmap_mode="r") for day in days]
+    trades = np.concatenate(arrays)
+    day_bounds = np.cumsum([len(array) for array in arrays])[:-1]
+    for day, day_trades in zip(days, np.split(trades, day_bounds)):
+      np.savez(self.partial_path(day), **day_partial(day_trades))
+    event_log.info("analytics_updated", trades=len(trades), days=len(days))
+
+
+def combine(partials: list[dict]):
+  pnl = np.concatenate([partial["pnl"] for partial in partials]) if partials else np.empty(0)
+  r = np.concatenate([partial["r"] for partial in partials]) if partials else np.empty(0)
+  closed = np.concatenate([partial["closed"] for partial in partials]) if partials else np.empty(0, dtype="datetime64[s]")
+  hold = np.concatenate([partial["hold"] for partial in partials]) if partials else np.empty(0, dtype=np.int64)
+  symbol_names = np.concatenate([partial["symbols"] for partial in partials]) if partials else np.empty(0, dtype="U16")
+  symbol_rows = np.concatenate([partial["symbol_stats"] for partial in partials]) if partials else np.empty((0, 4))
+  symbols, symbol_index = np.unique(symbol_names, return_inverse=True)
+  symbol_stats = np.zeros((len(symbols), 4))
+  np.add.at(symbol_stats, symbol_index, symbol_rows)
+  hour_stats = sum((partial["hour_stats"] for partial in partials), np.zeros((24, 4)))
+  r_histogram = sum((partial["r_histogram"] for partial in partials), np.zeros(len(r_bins) + 1, dtype=np.int64))
+
+  equity = np.cumsum(pnl)
+  drawdown = np.maximum.accumulate(np.concatenate([[0], equity]))[1:] - equity
+  wins, losses = pnl[pnl > 0], pnl[pnl <= 0]
+  win_rate = len(wins) / len(pnl) if len(pnl) else 0.0
+  return {
+    "trades": len(pnl),
+    "realized_pnl": float(pnl.sum()),
+    "win_rate": win_rate,
+    "average_win": float(wins.mean()) if len(wins) else 0.0,
+    "average_loss": float(losses.mean()) if len(losses) else 0.0,
+    "expectancy": float(pnl.mean()) if len(pnl) else 0.0,
+    "expectancy_r": float(r.mean()) if len(r) else 0.0,
+    "max_drawdown": float(drawdown.max()) if len(drawdown) else 0.0,
+    "hold_seconds": {
+      "mean": float(hold.mean()) if len(hold) else 0.0,
+      "median": float(np.median(hold)) if len(hold) else 0.0,
+      "p90": float(np.percentile(hold, 90)) if len(hold) else 0.0,
+      "winners_mean": float(hold[pnl > 0].mean()) if len(wins) else 0.0,
+      "losers_mean": float(hold[pnl <= 0].mean()) if len(losses) else 0.0
+    },
+    "equity_curve": (closed, equity),
+    "r_histogram": r_histogram,
+    "symbols": (symbols, symbol_stats),
+    "hours": hour_stats
+  }
+
+
+def write_report(analysis: dict, directory: str):
+  os.makedirs(directory, exist_ok=True)
+  lines = [
+    f"trades: {analysis['trades']}",
+    f"realized pnl: {analysis['realized_pnl']:.2f}",
+    f"win rate: {analysis['win_rate']:.1%}",
+    f"average win / loss: {analysis['average_win']:.2f} / {analysis['average_loss']:.2f}",
+    f"expectancy: {analysis['expectancy']:.2f} per trade, {analysis['expectancy_r']:.2f}R",
+    f"max drawdown: {analysis['max_drawdown']:.2f}",
+    "hold time (s): " + ", ".join(f"{name} {value:.0f}" for name, value in analysis["hold_seconds"].items()),
+    "",
+    "R distribution:"
+  ]
+  edges = ["< -3.0"] + [f"{low:+.1f} to {high:+.1f}" for low, high in zip(r_bins[:-1], r_bins[1:])] + [f">= {r_bins[-1]:+.1f}"]
+  for edge, count in zip(edges, analysis["r_histogram"]):
+    lines.append(f"  {edge:>14} {int(count):6d}")
+  report = "\n".join(lines)
+  with open(os.path.join(directory, "report.txt"), "w") as file:
+    file.write(report + "\n")
+
+  symbols, symbol_stats = analysis["symbols"]
+  write_csv(os.path.join(directory, "symbols.csv"), ["symbol", *stat_columns], [[symbol, *stats] for symbol, stats in zip(symbols, symbol_stats)])
+  write_csv(os.path.join(directory, "hours.csv"), ["hour_utc", *stat_columns], [[hour, *stats] for hour, stats in enumerate(analysis["hours"]) if stats[0]])
+  closed, equity = analysis["equity_curve"]
+  write_csv(os.path.join(directory, "equity.csv"), ["closed", "equity"], zip(closed.astype(str), np.round(equity, 2)))
+  return report
+
+
+def write_csv(path: str, header: list, rows):
+  with open(path, "w", newline="") as file:
+    writer = csv.writer(file)
+    writer.writerow(header)
+    writer.writerows(rows)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="multi-day performance analytics over the trade journal")
+  parser.add_argument("--start", type=date.fromisoformat)
+  parser.add_argument("--end", type=date.fromisoformat)
+  parser.add_argument("--dir", default=os.environ.get("TRADE_JOURNAL_DIR", "trade_journal"))
+  parser.add_argument("--out", default="analytics")
+  args = parser.parse_args()
+
+  event_log.configure(echo_level="info")
+  cache = AnalyticsCache(TradeJournal(args.dir), os.path.join(args.dir, "analytics_cache"))
+  print(write_report(combine(cache.partials(args.start, args.end)), args.out))
+  event_log.info("analytics_written", out=args.out)
@@ -0,0 +1,598 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from math import ceil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import decoding
+from interface import Quote
+from synthetic_orders import order_json, synthetic_order_flow
+from trade_history import Order, TradeHistory
+
+
+class DictQuote:
+  def __init__(self, quote_json):
+    self.position_json = quote_json
+
+  def update_quote(self, quote_change):
+    self.position_json = { **self.position_json, **quote_change }
+
+  @property
+  def bid(self):
+    return float(self.position_json.get("Bid") or self.position_json["Last"])
+
+  @property
+  def ask(self):
+    return float(self.position_json.get("Ask") or self.position_json["Last"])
+
+
+def quote_deltas(count: int, symbol="SPY", seed=0):
+  rng = random.Random(seed)
+  price = 450.0
+  snapshot = {
+    "Symbol": symbol, "Bid": "449.99", "Ask": "450.01", "Last": "450.00", "BidSize": "300", "AskSize": "200",
+    "LastSize": "100", "High": "452.10", "Low": "447.80", "Open": "448.50", "PreviousClose": "447.20",
+    "Volume": "31234567", "TradeTime": "2024-01-02T15:30:00Z", "NetChange": "2.80", "NetChangePct": "0.62"
+  }
+  deltas = []
+  for _ in range(count):
+    price = round(price + rng.choice((-0.01, 0, 0.01)), 2)
+    delta = { "Symbol": symbol }
+    kind = rng.random()
+    if kind < 0.5:
+      delta["Bid"] = f"{price - 0.01:.2f}"
+      delta["BidSize"] = str(rng.randint(1, 20) * 100)
+    elif kind < 0.8:
+      delta["Ask"] = f"{price + 0.01:.2f}"
+      delta["AskSize"] = str(rng.randint(1, 20) * 100)
+    else:
+      delta["Last"] = f"{price:.2f}"
+      delta["LastSize"] = str(rng.randint(1, 5) * 100)
+      delta["TradeTime"] = "2024-01-02T15:30:01Z"
+    deltas.append(delta)
+  return snapshot, deltas
+
+
+def run_quote_ticks(quote_class, snapshot, deltas):
+  quote = quote_class(snapshot)
+  stop_loss = 449.0
+  for delta in deltas:
+    quote.update_quote(delta)
+    quote.bid > stop_loss
+    quote.ask < stop_loss
+  return quote
+
+
+def measure_quote_allocations(quote_class, snapshot, deltas):
+  quote = quote_class(snapshot)
+  allocated = 0
+  tracemalloc.start()
+  for delta in deltas:
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    quote.update_quote(delta)
+    quote.bid
+    quote.ask
+    allocated += tracemalloc.get_traced_memory()[1] - current
+  tracemalloc.stop()
+  return allocated / len(deltas)
+
+
+def bench_quotes(args):
+  snapshot, deltas = quote_deltas(args.ticks)
+  for name, quote_class in (("dict Quote", DictQuote), ("slots Quote", Quote)):
+    start = time.perf_counter()
+    run_quote_ticks(quote_class, snapshot, deltas)
+    elapsed = time.perf_counter() - start
+    bytes_per_tick = measure_quote_allocations(quote_class, snapshot, deltas[:10000])
+    print(f"{name:12} {args.ticks / elapsed:12,.0f} ticks/sec  {bytes_per_tick:8.1f} bytes allocated/tick")
+
+
+def stream_payload(count: int, seed=0):
+  rng = random.Random(seed)
+  _, deltas = quote_deltas(count, seed=seed)
+  lines = []
+  for index, delta in enumerate(deltas):
+    kind = rng.random()
+    if kind < 0.05:
+      lines.append(("heartbeat", json.dumps({ "Heartbeat": index, "Timestamp": "2024-01-02T15:30:00Z" }, separators=(",", ":")).encode()))
+    elif kind < 0.15:
+      order = order_json(str(index), "SPY", "Market", "FLL", "Buy", "Open", 100, 100, 450.0, commission_fee=1.0)
+      lines.append(("order", json.dumps(order, separators=(",", ":")).encode()))
+    else:
+      lines.append(("quote", json.dumps(delta, separators=(",", ":")).encode()))
+  return lines
+
+
+def journal_payload(path: str):
+  from stream_journal import read_journal
+
+  kinds = { "orders": "order", "quotes": "quote", "positions": "position" }
+  lines = []
+  for _, stream, line in read_journal(path):
+    kind = kinds.get(stream.split("-", 1)[0])
+    if kind:
+      lines.append((kind, line))
+  return lines
+
+
+def bench_decode(args):
+  lines = journal_payload(args.journal) if args.journal else stream_payload(args.lines)
+  size = sum(len(line) for _, line in lines)
+  backends = { "json": json.loads }
+  for module_name, attribute in (("orjson", "loads"), ("msgspec", "json.decode")):
+    try:
+      module = importlib.import_module(module_name)
+      for name in attribute.split("."):
+        module = getattr(module, name)
+      backends[module_name] = module
+    except ImportError:
+      pass
+  source = args.journal or "synthetic"
+  print(f"{len(lines):,} lines from {source}, {size / 1e6:.1f} MB, default backend: {decoding.backend}")
+  for name, loads in backends.items():
+    start = time.perf_counter()
+    for _, line in lines:
+      loads(line)
+    elapsed = time.perf_counter() - start
+    print(f"{name:8} parse only        {len(lines) / elapsed:12,.0f} lines/sec")
+  decoders = { "order": decoding.decode_order, "quote": decoding.decode_quote, "heartbeat": decoding.decode_quote, "position": decoding.decode_position }
+  start = time.perf_counter()
+  for kind, line in lines:
+    decoders[kind](line)
+  elapsed = time.perf_counter() - start
+  print(f"{decoding.backend:8} typed decoders    {len(lines) / elapsed:12,.0f} lines/sec")
+
+
+class FakeOAuthHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+
+  def do_POST(self):
+    self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    body = json.dumps({ "access_token": "access", "refresh_token": "refresh", "expires_in": 1200 }).encode()
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, *args):
+    pass
+
+
+def bench_startup(args):
+  from http_client import ApiClient
+  from token_manager import TokenManager
+
+  server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOAuthHandler)
+  Thread(target=server.serve_forever, daemon=True).start()
+  token_url = f"http://127.0.0.1:{server.server_address[1]}/oauth/token"
+  timings = []
+  with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "refresh_token")
+    with open(path, "w") as file:
+      file.write("refresh")
+    for _ in range(args.runs):
+      start = time.perf_counter()
+      api = ApiClient(lambda: None)
+      token_manager = TokenManager(api, token_url, "client", "secret", "http://localhost", "http://localhost", path, use_keyring=False)
+      token_manager.start()
+      timings.append((time.perf_counter() - start) * 1000)
+      token_manager.stop()
+      api.close()
+  server.shutdown()
+  timings.sort()
+  print(f"warm token startup over {args.runs} runs: p50 {timings[len(timings) // 2]:.1f}ms, max {timings[-1]:.1f}ms")
+
+
+def percentile(values: list, p: int):
+  return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def latency_summary(samples_ns: list):
+  samples_ns.sort()
+  return { f"p{p}_us": round(percentile(samples_ns, p) / 1000, 2) for p in (50, 99) } | { "max_us": round(samples_ns[-1] / 1000, 2) }
+
+
+def ingest_orders(count: int, symbol_count: int, chunk_size=10000, seed=0):
+  trade_history = TradeHistory()
+  append_ns, positions_ns, is_opened_ns = [], [], []
+  flow = synthetic_order_flow(count, symbol_count, seed=seed)
+  ingest_seconds = 0
+  while True:
+    orders = [Order(order) for _, order in zip(range(chunk_size), flow)]
+    if not orders:
+      break
+    chunk_start = time.perf_counter()
+    for index, order in enumerate(orders):
+      start = time.perf_counter_ns()
+      trade_history.append(order)
+      append_ns.append(time.perf_counter_ns() - start)
+      trades = trade_history.trade_history.get(order.symbol)
+      if trades:
+        start = time.perf_counter_ns()
+        trades[-1].is_opened(order)
+        is_opened_ns.append(time.perf_counter_ns() - start)
+      if index % 100 == 0:
+        start = time.perf_counter_ns()
+        trade_history.get_positions()
+        positions_ns.append(time.perf_counter_ns() - start)
+    ingest_seconds += time.perf_counter() - chunk_start
+  return trade_history, append_ns, positions_ns, is_opened_ns, ingest_seconds
+
+
+def measure_trade_history_memory(count: int, symbol_count: int, chunk_size=10000, seed=0):
+  tracemalloc.start()
+  trade_history = TradeHistory()
+  flow = synthetic_order_flow(count, symbol_count, seed=seed)
+  while True:
+    orders = [Order(order) for _, order in zip(range(chunk_size), flow)]
+    if not orders:
+      break
+    for order in orders:
+      trade_history.append(order)
+  del orders
+  retained, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return retained, peak
+
+
+def bench_trade_history(args):
+  results = {}
+  for count in args.sizes:
+    trade_history, append_ns, positions_ns, is_opened_ns, ingest_seconds = ingest_orders(count, args.symbols)
+    start = time.perf_counter()
+    repr(trade_history)
+    repr_ms = (time.perf_counter() - start) * 1000
+    result = {
+      "orders_per_sec": round(count / ingest_seconds),
+      "append": latency_summary(append_ns),
+      "is_opened": latency_summary(is_opened_ns),
+      "get_positions": latency_summary(positions_ns),
+      "repr_ms": round(repr_ms, 1),
+      "trades": sum(len(trades) for trades in trade_history.trade_history.values())
+    }
+    if args.memory:
+      retained, peak = measure_trade_history_memory(count, args.symbols)
+      result["retained_mb"] = round(retained / 1e6, 1)
+      result["peak_mb"] = round(peak / 1e6, 1)
+    results[str(count)] = result
+    print(f"{count:>9,} orders: {json.dumps(result)}")
+  if args.baseline:
+    with open(args.baseline) as file:
+      baseline = json.load(file)
+    for count, result in results.items():
+      if count in baseline:
+        before, after = baseline[count]["orders_per_sec"], result["orders_per_sec"]
+        print(f"{int(count):>9,} orders: {after:,} vs baseline {before:,} orders/sec ({(after - before) / before:+.1%})")
+  if args.save:
+    with open(args.save, "w") as file:
+      json.dump(results, file, indent=2)
+    print(f"results saved to {args.save}")
+
+
+def open_positions(count: int, seed=0):
+  rng = random.Random(seed)
+  trade_history = TradeHistory()
+  quotes = {}
+  for index in range(count):
+    symbol = f"SYM{index:03d}"
+    price = round(rng.uniform(20, 500), 2)
+    is_long = index % 3 != 0
+    entry_side, exit_side = ("Buy", "Sell") if is_long else ("SellShort", "BuyToCover")
+    quantity = rng.randint(1, 20) * 10
+    stop_price = round(price * (0.99 if is_long else 1.01), 2)
+    trade_history.append(Order(order_json(f"{index}01", symbol, "StopMarket", "ACK", exit_side, "Close", quantity, stop_price=stop_price, conditional_order_id=f"{index}00")))
+    trade_history.append(Order(order_json(f"{index}00", symbol, "Market", "FLL", entry_side, "Open", quantity, quantity, price, conditional_order_id=f"{index}01", commission_fee=1.0)))
+    quotes[symbol] = Quote({ "Symbol": symbol, "Bid": f"{price - 0.01:.2f}", "Ask": f"{price + 0.01:.2f}", "Last": f"{price:.2f}" })
+  return trade_history, quotes
+
+
+def per_trade_pnl(positions: dict, quotes: dict):
+  rows = []
+  for symbol, trade in positions.items():
+    quote = quotes[symbol]
+    price = quote.bid if trade.side_factor == 1 else quote.ask
+    avg_entry = trade.entry_amount / trade.entry_quantity
+    per_share = (price - avg_entry) * trade.side_factor
+    rows.append((symbol, per_share * trade.opened_shares, per_share * trade.entry_quantity / trade.risk_amount))
+  return rows
+
+
+def bench_live_pnl(args):
+  from live_pnl import LivePnL
+
+  for count in args.positions:
+    trade_history, quotes = open_positions(count)
+    live_pnl = LivePnL(quotes)
+    start = time.perf_counter()
+    live_pnl.rebuild(trade_history.positions)
+    rebuild_us = (time.perf_counter() - start) * 1e6
+    rng = random.Random(1)
+    symbols = list(quotes)
+    ticks = [quotes[rng.choice(symbols)] for _ in range(args.ticks)]
+    update_ns, compute_ns, render_ns, per_trade_ns = [], [], [], []
+    for index, quote in enumerate(ticks):
+      start = time.perf_counter_ns()
+      live_pnl.update_quote(quote)
+      update_ns.append(time.perf_counter_ns() - start)
+      if index % args.batch == 0:
+        start = time.perf_counter_ns()
+        live_pnl.compute()
+        compute_ns.append(time.perf_counter_ns() - start)
+        start = time.perf_counter_ns()
+        live_pnl.render()
+        render_ns.append(time.perf_counter_ns() - start)
+        start = time.perf_counter_ns()
+        per_trade_pnl(trade_history.positions, quotes)
+        per_trade_ns.append(time.perf_counter_ns() - start)
+    print(f"{count:>5} positions: rebuild {rebuild_us:.0f}us")
+    print(f"  update_quote {latency_summary(update_ns)}")
+    print(f"  vectorized compute {latency_summary(compute_ns)}")
+    print(f"  compute + render {latency_summary(render_ns)}")
+    print(f"  per-trade python loop {latency_summary(per_trade_ns)}")
+
+
+def bench_log(args):
+  import io
+  from contextlib import redirect_stdout
+  from event_log import EventLog, format_json, format_text
+
+  orders = [Order(order) for _, order in zip(range(args.events), synthetic_order_flow(args.events, 20))]
+  fields = [{ "order_id": order.order_id, "symbol": order.symbol, "type": order.order_type, "status": order.status_description, "filled": order.execution_quantity, "ordered": order.ordered_quantity, "price": order.filled_price, "stop": order.stop_price } for order in orders]
+
+  print_ns = []
+  with redirect_stdout(io.StringIO()):
+    for order in orders:
+      start = time.perf_counter_ns()
+      print(order)
+      print_ns.append(time.perf_counter_ns() - start)
+  print(f"print(order) to buffer {latency_summary(print_ns)}")
+
+  with tempfile.TemporaryDirectory() as directory:
+    log = EventLog(capacity=len(orders) * 2)
+    log.configure(os.path.join(directory, "events.log"), "info", "error", { "sampled": args.sample_rate })
+    log.start()
+    log_ns, sampled_ns = [], []
+    start_all = time.perf_counter()
+    for index, order in enumerate(orders):
+      start = time.perf_counter_ns()
+      log.info("order", order_id=order.order_id, symbol=order.symbol, type=order.order_type, status=order.status_description, filled=order.execution_quantity, ordered=order.ordered_quantity, price=order.filled_price, stop=order.stop_price)
+      log_ns.append(time.perf_counter_ns() - start)
+      start = time.perf_counter_ns()
+      log.info("sampled", index=index)
+      sampled_ns.append(time.perf_counter_ns() - start)
+    log.close()
+    total_seconds = time.perf_counter() - start_all
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+  print(f"event_log.info (caller) {latency_summary(log_ns)}")
+  print(f"event_log.info sampled at {args.sample_rate} {latency_summary(sampled_ns)}")
+  print(f"  {log.metrics()}, {size / 1e6:.1f}MB written, {len(orders) * 2 / total_seconds:,.0f} events/sec incl. writer")
+
+  records = [(time.time(), 20, "order", event_fields) for event_fields in fields]
+  for name, format_record in (("json", format_json), ("text", format_text)):
+    format_ns = []
+    for record in records:
+      start = time.perf_counter_ns()
+      format_record(record)
+      format_ns.append(time.perf_counter_ns() - start)
+    print(f"format_{name} (writer thread) {latency_summary(format_ns)}")
+
+
+def start_fake_server(quote_rate: float, fill_delay: float, reject_rate=0.0, order_latency=0.0):
+  import socket
+  import subprocess
+  import sys
+
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+  process = subprocess.Popen([sys.executable, "fake_tradestation.py", "--port", str(port), "--quote-rate", str(quote_rate), "--fill-delay", str(fill_delay), "--reject-rate", str(reject_rate), "--order-latency", str(order_latency)], stdout=subprocess.DEVNULL)
+  for _ in range(100):
+    try:
+      socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+      return process, f"http://127.0.0.1:{port}/v3"
+    except OSError:
+      time.sleep(0.05)
+  process.kill()
+  raise RuntimeError("fake server did not start")
+
+
+def bench_quote_load(api_url: str, args):
+  from interface import update_quotes
+  from streaming import StreamingEngine
+
+  quotes = {}
+  symbols = [f"SYM{index:03d}" for index in range(args.symbols)]
+  engine = StreamingEngine(queue_size=10000)
+  stream = engine.subscribe("quotes", lambda: f"{api_url}/marketdata/stream/quotes/{','.join(symbols)}", dict, lambda quote: update_quotes(quotes, quote), decoding.decode_quote)
+  engine.start()
+  time.sleep(1)
+  received = stream.messages_received
+  start = time.perf_counter()
+  time.sleep(args.seconds)
+  rate = (stream.messages_received - received) / (time.perf_counter() - start)
+  engine.stop()
+  target = f"{args.quote_rate:,.0f}" if args.quote_rate else "unthrottled"
+  print(f"quote ingestion: {rate:12,.0f} msgs/sec over {args.seconds}s (target {target}, {len(quotes)} symbols)")
+
+
+def bench_order_load(api_url: str, args):
+  from threading import Condition
+  from http_client import ApiClient
+  from streaming import StreamingEngine
+
+  fills: dict[str, int] = {}
+  filled = Condition()
+
+  def on_order(order: Order):
+    if order.is_filled:
+      with filled:
+        fills[order.order_id] = time.perf_counter_ns()
+        filled.notify_all()
+
+  engine = StreamingEngine()
+  engine.subscribe("orders", lambda: f"{api_url}/brokerage/stream/accounts/SIM000001M/orders", dict, on_order, decoding.decode_order)
+  engine.start()
+  api = ApiClient(lambda: "fake")
+  time.sleep(0.5)
+  response_ns, fill_ns = [], []
+  for index in range(args.orders):
+    symbol = f"SYM{index % args.symbols:03d}"
+    payload = {
+      "AccountID": "SIM000001M", "Quantity": "100", "OrderType": "Market", "Symbol": symbol, "TradeAction": "BUY", "Route": "Intelligent",
+      "OSOs": [{ "Type": "NORMAL", "Orders": [{ "Quantity": "100", "OrderType": "StopMarket", "Symbol": symbol, "TradeAction": "SELL", "StopPrice": "1.00" }] }]
+    }
+    start = time.perf_counter_ns()
+    response = api.post(f"{api_url}/orderexecution/orders", json=payload)
+    response_ns.append(time.perf_counter_ns() - start)
+    entry_id, stop_id = [order["OrderID"] for order in response.json()["Orders"]]
+    with filled:
+      if filled.wait_for(lambda: entry_id in fills, timeout=5):
+        fill_ns.append(fills[entry_id] - start)
+    api.delete(f"{api_url}/orderexecution/orders/{stop_id}")
+    api.post(f"{api_url}/orderexecution/orders", json={ **payload, "TradeAction": "SELL", "OSOs": [] })
+  engine.stop()
+  api.close()
+  print(f"order round-trips over {args.orders} orders (fill delay {args.fill_delay * 1000:.0f}ms)")
+  print(f"  send to response: {latency_summary(response_ns)}")
+  print(f"  send to fill seen on stream: {latency_summary(fill_ns)} ({len(fill_ns)} fills)")
+
+
+def sequential_exit(engine, symbol: str, percent: float, account_id: str):
+  trade = engine.trade_history.positions[symbol]
+  shares_to_exit = ceil(trade.opened_shares * percent)
+  shares_to_keep = trade.opened_shares - shares_to_exit
+  stop_order = engine.trade_history.get_stop_order(symbol)
+  start = time.perf_counter()
+  engine.send_stop(stop_order, shares_to_keep)
+  order_id, _ = engine.send_order({ "AccountID": account_id, "Quantity": str(shares_to_exit), "OrderType": "Market", "Symbol": symbol, "TradeAction": "SELL", "Route": "Intelligent" })
+  engine.last_response_ms = (time.perf_counter() - start) * 1000
+  engine.confirm_exit(order_id)
+  engine.confirm_stop(stop_order.order_id, shares_to_keep)
+  engine.last_confirmed_ms = (time.perf_counter() - start) * 1000
+
+
+def bench_exit(args):
+  from exit_engine import ExitEngine, OrderWatcher
+  from http_client import ApiClient
+  from order_dispatcher import OrderRejected
+  from streaming import StreamingEngine
+
+  process, api_url = start_fake_server(10, args.fill_delay, args.reject_rate, args.order_latency)
+  trade_history = TradeHistory()
+  watcher = OrderWatcher(trade_history)
+
+  def on_order(order: Order):
+    trade_history.append(order)
+    watcher.observe(order)
+
+  streaming = StreamingEngine()
+  streaming.subscribe("orders", lambda: f"{api_url}/brokerage/stream/accounts/SIM000001M/orders", dict, on_order, decoding.decode_order)
+  streaming.start()
+  api = ApiClient(lambda: "fake")
+  engine = ExitEngine(api, api_url, trade_history, watcher)
+  time.sleep(0.5)
+  results = { "sequential": ([], []), "concurrent": ([], []) }
+  rejected = 0
+  try:
+    for index in range(args.exits):
+      symbol = f"SYM{index:03d}"
+      api.post(f"{api_url}/orderexecution/orders", json={
+        "AccountID": "SIM000001M", "Quantity": "100", "OrderType": "Market", "Symbol": symbol, "TradeAction": "BUY", "Route": "Intelligent",
+        "OSOs": [{ "Type": "NORMAL", "Orders": [{ "Quantity": "100", "OrderType": "StopMarket", "Symbol": symbol, "TradeAction": "SELL", "StopPrice": "1.00" }] }]
+      })
+      with watcher.condition:
+        watcher.condition.wait_for(lambda: symbol in trade_history.positions and trade_history.get_stop_order(symbol) is not None, 5)
+      mode = "sequential" if index % 2 else "concurrent"
+      if mode == "sequential":
+        sequential_exit(engine, symbol, 0.5, "SIM000001M")
+      else:
+        try:
+          engine.exit(symbol, 0.5, "SIM000001M")
+        except OrderRejected:
+          pass
+        exit_state, _ = engine.settlements[symbol].result()
+        if exit_state == "rejected":
+          rejected += 1
+      results[mode][0].append(engine.last_response_ms * 1e6)
+      results[mode][1].append(engine.last_confirmed_ms * 1e6)
+  finally:
+    streaming.stop()
+    engine.close()
+    api.close()
+    process.kill()
+  for mode, (response_ns, confirmed_ns) in results.items():
+    print(f"{mode:10} exits: both legs answered {latency_summary(response_ns)}")
+    print(f"{'':10}        both legs confirmed {latency_summary(confirmed_ns)}")
+  print(f"concurrent exits rejected: {rejected}, stop repairs: {engine.repairs}")
+
+
+def bench_load(args):
+  process, api_url = start_fake_server(args.quote_rate, args.fill_delay)
+  try:
+    bench_quote_load(api_url, args)
+    bench_order_load(api_url, args)
+  finally:
+    process.kill()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="quick-trades benchmarks")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  quote_parser = subparsers.add_parser("quotes", help="Quote updates per tick")
+  quote_parser.add_argument("--ticks", type=int, default=200000)
+  quote_parser.set_defaults(run=bench_quotes)
+
+  decode_parser = subparsers.add_parser("decode", help="stream line decoding backends")
+  decode_parser.add_argument("--lines", type=int, default=200000)
+  decode_parser.add_argument("--journal", help="decode a recorded .streams.gz capture (JOURNAL_DIR) instead of synthetic lines")
+  decode_parser.set_defaults(run=bench_decode)
+
+  startup_parser = subparsers.add_parser("startup", help="token startup from a stored refresh token against a local OAuth endpoint")
+  startup_parser.add_argument("--runs", type=int, default=20)
+  startup_parser.set_defaults(run=bench_startup)
+
+  trade_history_parser = subparsers.add_parser("trade-history", help="TradeHistory/Trade under synthetic order flow")
+  trade_history_parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+  trade_history_parser.add_argument("--symbols", type=int, default=50)
+  trade_history_parser.add_argument("--memory", action="store_true", help="also measure retained and peak memory (slower)")
+  trade_history_parser.add_argument("--save", help="write results to a JSON baseline file")
+  trade_history_parser.add_argument("--baseline", help="compare against a saved JSON baseline file")
+  trade_history_parser.set_defaults(run=bench_trade_history)
+
+  live_pnl_parser = subparsers.add_parser("live-pnl", help="vectorized unrealized P&L/R across open positions")
+  live_pnl_parser.add_argument("--positions", type=int, nargs="+", default=[10, 50, 200])
+  live_pnl_parser.add_argument("--ticks", type=int, default=100000)
+  live_pnl_parser.add_argument("--batch", type=int, default=100, help="quote ticks per UI frame")
+  live_pnl_parser.set_defaults(run=bench_live_pnl)
+
+  exit_parser = subparsers.add_parser("exit", help="sequential vs concurrent stop/exit legs against fake_tradestation.py")
+  exit_parser.add_argument("--exits", type=int, default=100)
+  exit_parser.add_argument("--fill-delay", type=float, default=0.01)
+  exit_parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of exit orders the fake server rejects")
+  exit_parser.add_argument("--order-latency", type=float, default=0.05, help="seconds the fake order endpoints take to answer")
+  exit_parser.set_defaults(run=bench_exit)
+
+  load_parser = subparsers.add_parser("load", help="quote ingestion and order round-trips against fake_tradestation.py")
+  load_parser.add_argument("--quote-rate", type=float, default=20000, help="quote messages/sec from the fake server, 0 for unthrottled")
+  load_parser.add_argument("--symbols", type=int, default=20)
+  load_parser.add_argument("--seconds", type=float, default=5)
+  load_parser.add_argument("--orders", type=int, default=200)
+  load_parser.add_argument("--fill-delay", type=float, default=0.01)
+  load_parser.set_defaults(run=bench_load)
+
+  log_parser = subparsers.add_parser("log", help="hot-path cost of event_log vs printing orders")
+  log_parser.add_argument("--events", type=int, default=100000)
+  log_parser.add_argument("--sample-rate", type=float, default=0.01)
+  log_parser.set_defaults(run=bench_log)
+
+  args = parser.parse_args()
+  args.run(args)
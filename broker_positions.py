@@ -0,0 +1,89 @@
+import time
+
+from event_log import event_log
+from interface import Position
+from trade_history import Trade
+
+
+class BrokerPositions:
+  def __init__(self, pnl_tolerance=1.0, grace=2.0):
+    self.pnl_tolerance = pnl_tolerance
+    self.grace = grace
+    self.positions: dict[str, Position] = {}
+    self.position_id_by_symbol: dict[str, str] = {}
+    self.drift: dict[str, tuple[str, float]] = {}
+    self.reported: set[str] = set()
+
+  def __contains__(self, symbol: str):
+    return symbol in self.position_id_by_symbol
+
+  def get(self, symbol: str):
+    position_id = self.position_id_by_symbol.get(symbol)
+    return self.positions.get(position_id) if position_id else None
+
+  def apply(self, position_json: dict):
+    position_id = position_json.get("PositionID")
+    if position_id is None:
+      return None
+    if "Deleted" in position_json:
+      position = self.positions.pop(position_id, None)
+      if position is None:
+        return None
+      if self.position_id_by_symbol.get(position.symbol) == position_id:
+        del self.position_id_by_symbol[position.symbol]
+      return position.symbol
+    if "Symbol" not in position_json:
+      return None
+    position = self.positions.get(position_id)
+    if position is None:
+      position = self.positions[position_id] = Position(position_json)
+    else:
+      position.update_position(position_json)
+    self.position_id_by_symbol[position.symbol] = position_id
+    return position.symbol
+
+  def replace(self, positions_json: list[dict]):
+    self.positions = {}
+    self.position_id_by_symbol = {}
+    for position_json in positions_json:
+      self.apply(position_json)
+
+  def reconcile(self, symbol: str, trade: Trade = None):
+    position = self.get(symbol)
+    broker_shares = position.shares if position else 0
+    shares = trade.opened_shares * trade.side_factor if trade else 0
+    problem = None
+    if broker_shares != shares:
+      problem = f"broker {broker_shares} vs trades {shares} shares"
+    elif position and trade and trade.entry_quantity:
+      unrealized = (position.last - trade.entry_amount / trade.entry_quantity) * shares
+      if abs(unrealized - position.unrealized) > self.pnl_tolerance:
+        problem = f"broker unrealized {position.unrealized:.2f} vs trades {unrealized:.2f}"
+    if problem:
+      self.drift[symbol] = (problem, self.drift[symbol][1] if symbol in self.drift else time.time())
+    elif symbol in self.drift:
+      _, since = self.drift.pop(symbol)
+      if symbol in self.reported:
+        self.reported.discard(symbol)
+        event_log.info("position_drift_resolved", symbol=symbol, seconds=round(time.time() - since, 1))
+    return problem
+
+  def reconcile_all(self, trades: dict[str, Trade]):
+    for symbol in self.position_id_by_symbol.keys() | trades.keys() | self.drift.keys():
+      self.reconcile(symbol, trades.get(symbol))
+
+  def persistent_drift(self):
+    now = time.time()
+    return { symbol: (problem, since) for symbol, (problem, since) in list(self.drift.items()) if now - since >= self.grace }
+
+  def report_drift(self):
+    drift = self.persistent_drift()
+    for symbol, (problem, _) in drift.items():
+      if symbol not in self.reported:
+        self.reported.add(symbol)
+        event_log.warning("position_drift", symbol=symbol, problem=problem)
+    return drift
+
+  def drift_lines(self):
+    now = time.time()
+    return [f"drift {symbol}: {problem} ({now - since:.0f}s)" for symbol, (problem, since) in self.persistent_drift().items()]
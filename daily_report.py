@@ -0,0 +1,50 @@
+import argparse
+import os
+from datetime import date
+
+import numpy as np
+
+from trade_journal import TradeJournal
+
+
+def summarize(trades: np.ndarray):
+  realized = trades["realized_amount"]
+  return {
+    "trades": len(trades),
+    "realized_pnl": round(float(realized.sum()), 2),
+    "commissions": round(float((trades["commission_fee"] * trades["side_factor"]).sum()), 2),
+    "win_rate": round(float((realized > 0).mean()), 3) if len(trades) else 0.0,
+    "average_r": round(float(trades["realized_reward"].mean()), 2) if len(trades) else 0.0,
+    "total_r": round(float(trades["realized_reward"].sum()), 2)
+  }
+
+
+def daily_breakdown(trades: np.ndarray):
+  days, day_index = np.unique(trades["closed"].astype("datetime64[D]"), return_inverse=True)
+  counts = np.bincount(day_index, minlength=len(days))
+  pnl = np.bincount(day_index, weights=trades["realized_amount"], minlength=len(days))
+  r = np.bincount(day_index, weights=trades["realized_reward"], minlength=len(days))
+  commissions = np.bincount(day_index, weights=trades["commission_fee"] * trades["side_factor"], minlength=len(days))
+  wins = np.bincount(day_index, weights=trades["realized_amount"] > 0, minlength=len(days))
+  return days, counts, pnl, r, commissions, wins / np.maximum(counts, 1)
+
+
+def report(trades: np.ndarray):
+  lines = [f"{'day':10} {'trades':>6} {'pnl':>10} {'R':>7} {'fees':>8} {'win%':>6}"]
+  for day, count, pnl, r, commissions, win_rate in zip(*daily_breakdown(trades)):
+    lines.append(f"{str(day):10} {count:6d} {pnl:10.2f} {r:7.2f} {commissions:8.2f} {win_rate:6.1%}")
+  summary = summarize(trades)
+  lines.append(f"{'total':10} {summary['trades']:6d} {summary['realized_pnl']:10.2f} {summary['total_r']:7.2f} {summary['commissions']:8.2f} {summary['win_rate']:6.1%}")
+  lines.append(f"average R per trade: {summary['average_r']}")
+  return "\n".join(lines)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="realized P&L report from the trade journal")
+  parser.add_argument("--start", type=date.fromisoformat, default=date.today())
+  parser.add_argument("--end", type=date.fromisoformat)
+  parser.add_argument("--dir", default=os.environ.get("TRADE_JOURNAL_DIR", "trade_journal"))
+  args = parser.parse_args()
+
+  trades = TradeJournal(args.dir).load_trades(args.start, args.end)
+  print(report(trades))
@@ -0,0 +1,49 @@
+import json
+
+from event_log import event_log
+from trade_history import Order
+
+try:
+  import orjson
+  loads = orjson.loads
+  backend = "orjson"
+except ImportError:
+  try:
+    import msgspec
+    loads = msgspec.json.decode
+    backend = "msgspec"
+  except ImportError:
+    loads = json.loads
+    backend = "json"
+
+control_prefixes = (b'{"Heartbeat"', b'{"StreamStatus"')
+
+
+def is_control_line(line: bytes):
+  return line.startswith(control_prefixes)
+
+
+def decode_order(line: bytes):
+  if is_control_line(line):
+    return None
+  order_json = loads(line)
+  if "OrderID" in order_json:
+    return Order(order_json)
+  event_log.info("order_stream_message", message=order_json)
+  return None
+
+
+def decode_quote(line: bytes):
+  if is_control_line(line):
+    return None
+  quote_json = loads(line)
+  if "Symbol" in quote_json:
+    return quote_json
+  event_log.info("quote_stream_message", message=quote_json)
+  return None
+
+
+def decode_position(line: bytes):
+  if is_control_line(line):
+    return None
+  return loads(line)
@@ -4,3 +4,22 @@ $env:REDIRECT_URL="http://localhost:3001"
 $env:USERNAME="xxxx"
 $env:PASSWORD="xxxx"
 $env:MODE="SIM"
+$env:QUOTE_STREAMS="1"
+$env:UI_REFRESH_RATE="30"
+$env:LATENCY_REPORT="order_latency.csv"
+$env:SYMBOL_CACHE="symbol_cache.json"
+$env:WATCHLIST="SPY,QQQ,IWM"
+$env:REFRESH_TOKEN_FILE="refresh_token"
+$env:JOURNAL_DIR="journal"
+$env:TRADE_JOURNAL_DIR="trade_journal"
+$env:TICK_BUFFER_SIZE="4096"
+$env:ORDER_DEDUPE_WINDOW="1.0"
+$env:PNL_DRIFT_TOLERANCE="1.0"
+$env:EVENT_LOG="logs/events.log"
+$env:LOG_LEVEL="info"
+$env:LOG_ECHO="warning"
+$env:LOG_SAMPLING="quote_stream_message=0.1"
+
+# point at a local fake_tradestation.py server for offline runs
+# $env:API_URL="http://127.0.0.1:8765/v3"
+# $env:SIGNIN_URL="http://127.0.0.1:8765"
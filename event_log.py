@@ -0,0 +1,166 @@
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from threading import Event, Lock, Thread
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+levels = { "debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR }
+level_names = { severity: name for name, severity in levels.items() }
+
+
+def format_json(record: tuple):
+  timestamp, severity, event, fields = record
+  return json.dumps({ "ts": round(timestamp, 6), "level": level_names[severity], "event": event, **fields }, default=str, separators=(",", ":"))
+
+
+def format_text(record: tuple):
+  timestamp, severity, event, fields = record
+  details = " ".join(f"{key}={value}" for key, value in fields.items())
+  return f"{time.strftime('%H:%M:%S', time.localtime(timestamp))} {level_names[severity]:7} {event} {details}".rstrip()
+
+
+def parse_sampling(spec: str):
+  sampling = {}
+  for item in spec.split(","):
+    if "=" in item:
+      event, rate = item.split("=", 1)
+      sampling[event.strip()] = float(rate)
+  return sampling
+
+
+class EventLog:
+  # while the writer runs, stream threads only append a tuple to a bounded deque
+  # (atomic, drops the oldest record when full); before start and after close
+  # records are written synchronously instead
+  def __init__(self, capacity=10000):
+    self.buffer: deque[tuple] = deque(maxlen=capacity)
+    self.level = INFO
+    self.echo_level = WARNING
+    self.sampling: dict[str, float] = {}
+    self.path: str = None
+    self.max_bytes = 10_000_000
+    self.backups = 5
+    self.flush_interval = 0.25
+    self.thread: Thread = None
+    self.stopped = Event()
+    self.lock = Lock()
+    self.logged = 0
+    self.written = 0
+    self.sampled_out = 0
+
+  def configure(self, path: str = None, level="info", echo_level="warning", sampling: dict[str, float] = None, max_bytes=10_000_000, backups=5, flush_interval=0.25):
+    self.path = path
+    self.level = levels[level]
+    self.echo_level = levels[echo_level]
+    self.sampling = sampling or {}
+    self.max_bytes = max_bytes
+    self.backups = backups
+    self.flush_interval = flush_interval
+    if self.path:
+      os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+  def start(self):
+    self.stopped.clear()
+    self.thread = Thread(target=self.run, daemon=True)
+    self.thread.start()
+
+  def close(self, timeout=5):
+    thread, self.thread = self.thread, None
+    if thread:
+      self.stopped.set()
+      thread.join(timeout)
+
+  def log(self, severity: int, event: str, fields: dict):
+    if severity < self.level:
+      return
+    rate = self.sampling.get(event)
+    if rate is not None and severity < WARNING and random.random() >= rate:
+      self.sampled_out += 1
+      return
+    self.logged += 1
+    record = (time.time(), severity, event, fields)
+    if self.thread is None:
+      self.write_now(record)
+    else:
+      self.buffer.append(record)
+
+  def write_now(self, record: tuple):
+    with self.lock:
+      if self.path:
+        with open(self.path, "a") as file:
+          self.write([record], file)
+      else:
+        self.write([record], None)
+
+  def debug(self, event: str, **fields):
+    self.log(DEBUG, event, fields)
+
+  def info(self, event: str, **fields):
+    self.log(INFO, event, fields)
+
+  def warning(self, event: str, **fields):
+    self.log(WARNING, event, fields)
+
+  def error(self, event: str, **fields):
+    self.log(ERROR, event, fields)
+
+  def run(self):
+    file = open(self.path, "a") if self.path else None
+    try:
+      while not self.stopped.wait(self.flush_interval):
+        file = self.flush(file)
+      file = self.flush(file)
+    finally:
+      if file:
+        file.close()
+
+  def drain(self):
+    records = []
+    while self.buffer:
+      try:
+        records.append(self.buffer.popleft())
+      except IndexError:
+        break
+    return records
+
+  def flush(self, file):
+    records = self.drain()
+    if not records:
+      return file
+    with self.lock:
+      self.write(records, file)
+      if file and file.tell() > self.max_bytes:
+        file = self.rotate(file)
+    return file
+
+  def write(self, records: list[tuple], file):
+    echo = [format_text(record) for record in records if record[1] >= self.echo_level]
+    if echo:
+      sys.stdout.write("\n".join(echo) + "\n")
+      sys.stdout.flush()
+    if file:
+      file.write("".join(format_json(record) + "\n" for record in records))
+      file.flush()
+    self.written += len(records)
+
+  def rotate(self, file):
+    file.close()
+    for index in range(self.backups - 1, 0, -1):
+      if os.path.exists(f"{self.path}.{index}"):
+        os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+    os.replace(self.path, f"{self.path}.1")
+    return open(self.path, "a")
+
+  def metrics(self):
+    return {
+      "logged": self.logged,
+      "written": self.written,
+      "sampled_out": self.sampled_out,
+      "dropped": max(self.logged - self.written - len(self.buffer), 0)
+    }
+
+
+event_log = EventLog()
@@ -0,0 +1,202 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from math import ceil
+from threading import Condition
+from typing import Callable
+
+from event_log import event_log
+from http_client import ApiClient
+from order_dispatcher import OrderRejected
+from order_latency import OrderLatency
+from trade_history import Order, Trade, TradeHistory
+
+
+class OrderWatcher:
+  def __init__(self, trade_history: TradeHistory):
+    self.trade_history = trade_history
+    self.condition = Condition()
+
+  def observe(self, order: Order):
+    with self.condition:
+      self.condition.notify_all()
+
+  def get(self, order_id: str):
+    return self.trade_history.order_history.get(order_id)
+
+  def wait(self, order_id: str, predicate: Callable[[Order], bool], timeout: float):
+    def matched():
+      order = self.get(order_id)
+      return order is not None and predicate(order)
+    with self.condition:
+      return self.condition.wait_for(matched, timeout)
+
+
+class ExitEngine:
+  def __init__(self, api: ApiClient, api_url: str, trade_history: TradeHistory, watcher: OrderWatcher, order_latency: OrderLatency = None, confirm_timeout=5.0):
+    self.api = api
+    self.api_url = api_url
+    self.trade_history = trade_history
+    self.watcher = watcher
+    self.order_latency = order_latency or OrderLatency()
+    self.confirm_timeout = confirm_timeout
+    self.executor = ThreadPoolExecutor(4, thread_name_prefix="exit")
+    # confirmation and repair wait on the order stream, off the symbol's dispatcher lane
+    self.confirmations = ThreadPoolExecutor(4, thread_name_prefix="exit-confirm")
+    self.settlements: dict[str, Future] = {}
+    self.exits = 0
+    self.rejected = 0
+    self.repairs = 0
+    self.last_response_ms = 0
+    self.last_confirmed_ms = 0
+
+  def exit(self, symbol: str, percent: float, account_id: str, latency_ref: int = None):
+    trade = self.trade_history.positions.get(symbol)
+    if trade is None:
+      raise OrderRejected(f"not in any {symbol} position")
+    current_shares = abs(trade.opened_shares)
+    shares_to_exit = ceil(int(current_shares) * percent)
+    shares_to_keep = current_shares - shares_to_exit
+    stop_order = self.trade_history.get_stop_order(symbol)
+    if stop_order and stop_order.is_terminal:
+      stop_order = None
+    exit_payload = {
+      "AccountID": account_id,
+      "TimeInForce": {
+        "Duration": "DAY"
+      },
+      "Quantity": str(shares_to_exit),
+      "OrderType": "Market",
+      "Symbol": symbol,
+      "TradeAction": "BUYTOCOVER" if trade.side_factor == -1 else "SELL",
+      "Route": "Intelligent"
+    }
+    self.order_latency.mark(latency_ref, "payload")
+
+    start = time.perf_counter()
+    stop_leg = self.executor.submit(self.send_stop, stop_order, shares_to_keep) if stop_order else None
+    exit_leg = self.executor.submit(self.send_order, exit_payload, latency_ref)
+    exit_order_id, exit_error = exit_leg.result()
+    stop_error = stop_leg.result() if stop_leg else None
+    self.last_response_ms = (time.perf_counter() - start) * 1000
+    self.exits += 1
+    self.settlements[symbol] = self.confirmations.submit(self.settle, trade, stop_order, shares_to_exit, shares_to_keep, account_id, exit_order_id, stop_error, start)
+    if exit_order_id is None:
+      raise OrderRejected(f"{exit_error or 'exit order rejected'}; checking stop")
+    return f"{shares_to_exit} shares sent in {self.last_response_ms:.0f}ms"
+
+  def settle(self, trade: Trade, stop_order: Order, shares_to_exit: int, shares_to_keep: int, account_id: str, exit_order_id: str, stop_error: str, start: float):
+    exit_state, stop_state = "unknown", "unknown"
+    try:
+      exit_state = self.confirm_exit(exit_order_id) if exit_order_id else "rejected"
+      stop_state = "none"
+      if stop_order:
+        stop_state = "failed" if stop_error else self.confirm_stop(stop_order.order_id, shares_to_keep)
+      self.last_confirmed_ms = (time.perf_counter() - start) * 1000
+
+      if exit_state == "rejected" and stop_state in ("replaced", "cancelled", "unconfirmed"):
+        stop_state = self.restore_stop(trade, stop_order, account_id)
+      elif exit_state == "filled" and stop_state == "failed":
+        stop_state = self.resize_stop(trade, stop_order)
+    except Exception as e:
+      event_log.error("exit_settle_error", symbol=trade.symbol, error=repr(e))
+    if exit_state == "rejected":
+      self.rejected += 1
+      event_log.warning("exit_rejected", symbol=trade.symbol, shares=shares_to_exit, stop=stop_state)
+    event_log.info("exit", symbol=trade.symbol, shares=shares_to_exit, exit=exit_state, stop=stop_state, response_ms=round(self.last_response_ms, 1), confirmed_ms=round(self.last_confirmed_ms, 1))
+    return exit_state, stop_state
+
+  def send_stop(self, stop_order: Order, quantity: int):
+    try:
+      if quantity > 0:
+        stop_order_payload = {
+          "Quantity": str(quantity),
+          "OrderType": "StopMarket",
+          "StopPrice": str(stop_order.stop_price)
+        }
+        response = self.api.put(f"{self.api_url}/orderexecution/orders/{stop_order.order_id}", json=stop_order_payload)
+      else:
+        response = self.api.delete(f"{self.api_url}/orderexecution/orders/{stop_order.order_id}")
+    except Exception as e:
+      event_log.error("stop_order_error", order_id=stop_order.order_id, error=repr(e))
+      return str(e)
+    event_log.info("stop_order_response", order_id=stop_order.order_id, quantity=quantity, status=response.status_code, total_ms=response.total_ms, connect_ms=response.connect_ms, server_ms=response.server_ms, body=response.text)
+    return None if response.status_code == 200 else f"{response.status_code} {response.text}"
+
+  def send_order(self, payload: dict, latency_ref: int = None):
+    try:
+      self.order_latency.mark(latency_ref, "send")
+      response = self.api.post(f"{self.api_url}/orderexecution/orders", json=payload)
+      self.order_latency.mark(latency_ref, "response")
+    except Exception as e:
+      event_log.error("order_error", symbol=payload.get("Symbol"), error=repr(e))
+      return None, str(e)
+    event_log.info("order_response", symbol=payload.get("Symbol"), order_type=payload.get("OrderType"), status=response.status_code, total_ms=response.total_ms, connect_ms=response.connect_ms, server_ms=response.server_ms, body=response.text)
+    if response.status_code != 200:
+      return None, f"{response.status_code} {response.text}"
+    orders = response.json().get("Orders", [])
+    for order in orders:
+      if "OrderID" in order:
+        self.order_latency.link(latency_ref, order["OrderID"])
+    if not orders or "OrderID" not in orders[0] or "Error" in orders[0]:
+      return None, orders[0].get("Message") if orders else response.text
+    return orders[0]["OrderID"], None
+
+  def confirm_exit(self, order_id: str):
+    if not self.watcher.wait(order_id, lambda order: order.is_terminal, self.confirm_timeout):
+      return "unconfirmed"
+    return "filled" if self.watcher.get(order_id).is_filled else "rejected"
+
+  def confirm_stop(self, order_id: str, quantity: int):
+    if quantity > 0:
+      confirmed = self.watcher.wait(order_id, lambda order: order.ordered_quantity == quantity or order.is_terminal, self.confirm_timeout)
+    else:
+      confirmed = self.watcher.wait(order_id, lambda order: order.is_terminal, self.confirm_timeout)
+    if not confirmed:
+      return "unconfirmed"
+    order = self.watcher.get(order_id)
+    if order.is_filled:
+      return "filled"
+    return "cancelled" if order.is_terminal else "replaced"
+
+  def restore_stop(self, trade: Trade, stop_order: Order, account_id: str):
+    shares = abs(trade.opened_shares)
+    current = self.watcher.get(stop_order.order_id)
+    self.repairs += 1
+    if current is not None and not current.is_terminal:
+      event_log.warning("stop_repair", order_id=stop_order.order_id, action="restore", shares=shares)
+      return "restored" if self.send_stop(stop_order, shares) is None else "repair failed"
+    event_log.warning("stop_repair", order_id=stop_order.order_id, action="replace", shares=shares)
+    payload = {
+      "AccountID": account_id,
+      "TimeInForce": {
+        "Duration": "GTC"
+      },
+      "Quantity": str(shares),
+      "OrderType": "StopMarket",
+      "Symbol": trade.symbol,
+      "TradeAction": "SELL" if trade.side_factor == 1 else "BUYTOCOVER",
+      "Route": "Intelligent",
+      "StopPrice": str(stop_order.stop_price)
+    }
+    order_id, error = self.send_order(payload)
+    return "replaced after failed exit" if order_id else f"repair failed: {error}"
+
+  def resize_stop(self, trade: Trade, stop_order: Order):
+    shares = abs(trade.opened_shares)
+    self.repairs += 1
+    event_log.warning("stop_repair", order_id=stop_order.order_id, action="resize", shares=shares)
+    error = self.send_stop(stop_order, shares)
+    return ("resized" if shares else "cancelled") if error is None else f"repair failed: {error}"
+
+  def metrics(self):
+    return {
+      "exits": self.exits,
+      "rejected": self.rejected,
+      "repairs": self.repairs,
+      "last_response_ms": round(self.last_response_ms, 1),
+      "last_confirmed_ms": round(self.last_confirmed_ms, 1)
+    }
+
+  def close(self):
+    self.executor.shutdown(wait=True)
+    self.confirmations.shutdown(wait=True)
@@ -0,0 +1,401 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, SimpleQueue
+from threading import Event, Lock, Thread, Timer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic_orders import order_json
+
+trade_actions = {
+  "BUY": ("Buy", "Open"),
+  "SELL": ("Sell", "Close"),
+  "SELLSHORT": ("SellShort", "Open"),
+  "BUYTOCOVER": ("BuyToCover", "Close")
+}
+terminal_statuses = { "FLL", "OUT", "REJ" }
+
+
+def dumps(message: dict):
+  return json.dumps(message, separators=(",", ":")).encode()
+
+
+def now():
+  return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeOrder:
+  def __init__(self, order_id: str, symbol: str, order_type: str, trade_action: str, quantity: int, stop_price: float = None, conditional_order_id: str = None):
+    self.order_id = order_id
+    self.symbol = symbol
+    self.order_type = order_type
+    self.buy_or_sell, self.open_or_close = trade_actions[trade_action]
+    self.quantity = quantity
+    self.stop_price = stop_price
+    self.conditional_order_id = conditional_order_id
+    self.status = "ACK"
+    self.exec_quantity = 0
+    self.filled_price = 0.0
+    self.working = False
+    self.opened_date_time = now()
+
+  @property
+  def side_factor(self):
+    return 1 if self.buy_or_sell in ("Buy", "BuyToCover") else -1
+
+  @property
+  def is_terminal(self):
+    return self.status in terminal_statuses
+
+  def to_json(self):
+    return order_json(
+      self.order_id, self.symbol, self.order_type, self.status, self.buy_or_sell, self.open_or_close, self.quantity,
+      self.exec_quantity, self.filled_price, self.stop_price, self.conditional_order_id, self.exec_quantity * 0.005, self.opened_date_time
+    )
+
+
+class FakeBroker:
+  def __init__(self, quote_rate=10, fill_delay=0.05, heartbeat_interval=5, seed=0, reject_rate=0.0, order_latency=0.0):
+    self.quote_rate = quote_rate
+    self.fill_delay = fill_delay
+    self.reject_rate = reject_rate
+    self.order_latency = order_latency
+    self.heartbeat_interval = heartbeat_interval
+    self.rng = random.Random(seed)
+    self.lock = Lock()
+    self.stopped = Event()
+    self.accounts = [
+      { "AccountID": "SIM000001M", "AccountType": "Margin", "Currency": "USD", "Status": "Active" },
+      { "AccountID": "SIM000001F", "AccountType": "Futures", "Currency": "USD", "Status": "Active" }
+    ]
+    self.prices: dict[str, float] = {}
+    self.orders: dict[str, FakeOrder] = {}
+    self.positions: dict[str, dict] = {}
+    self.order_listeners: list[SimpleQueue] = []
+    self.position_listeners: list[SimpleQueue] = []
+    self.next_order_id = 1000
+    self.next_position_id = 1
+    self.stream_generation = 0
+
+  def price(self, symbol: str):
+    if symbol not in self.prices:
+      self.prices[symbol] = round(self.rng.uniform(20, 500), 2)
+    return self.prices[symbol]
+
+  def quote(self, symbol: str):
+    price = self.price(symbol)
+    return {
+      "Symbol": symbol, "Bid": f"{price - 0.01:.2f}", "Ask": f"{price + 0.01:.2f}", "Last": f"{price:.2f}",
+      "BidSize": "100", "AskSize": "100", "LastSize": "100", "TradeTime": now()
+    }
+
+  def tick(self, symbol: str):
+    with self.lock:
+      price = self.prices[symbol] = round(max(self.price(symbol) + self.rng.choice((-0.01, 0, 0.01)), 0.02), 2)
+      kind = self.rng.random()
+      if kind < 0.4:
+        quote = { "Symbol": symbol, "Bid": f"{price - 0.01:.2f}", "BidSize": str(self.rng.randint(1, 20) * 100) }
+      elif kind < 0.8:
+        quote = { "Symbol": symbol, "Ask": f"{price + 0.01:.2f}", "AskSize": str(self.rng.randint(1, 20) * 100) }
+      else:
+        quote = { "Symbol": symbol, "Last": f"{price:.2f}", "LastSize": str(self.rng.randint(1, 5) * 100), "TradeTime": now() }
+      self.trigger_stops(symbol, price)
+      return quote
+
+  def publish(self, listeners: list[SimpleQueue], message: dict):
+    line = dumps(message)
+    for listener in list(listeners):
+      listener.put(line)
+
+  def emit(self, order: FakeOrder):
+    self.publish(self.order_listeners, order.to_json())
+
+  def place_order(self, payload: dict):
+    with self.lock:
+      entry = self.new_order(payload)
+      children = [self.new_order(child, entry.order_id) for oso in payload.get("OSOs", []) for child in oso.get("Orders", [])]
+      if children:
+        entry.conditional_order_id = children[0].order_id
+      for child in children:
+        self.emit(child)
+      self.emit(entry)
+      if entry.order_type == "Market":
+        Timer(self.fill_delay, self.fill, (entry.order_id,)).start()
+      else:
+        entry.working = True
+      orders = [entry, *children]
+    return { "Orders": [{ "Message": f"Sent order: {order.buy_or_sell} {order.quantity} {order.symbol} {order.order_type}", "OrderID": order.order_id } for order in orders] }
+
+  def new_order(self, payload: dict, conditional_order_id: str = None):
+    self.next_order_id += 1
+    stop_price = float(payload["StopPrice"]) if "StopPrice" in payload else None
+    order = FakeOrder(str(self.next_order_id), payload["Symbol"].upper(), payload["OrderType"], payload["TradeAction"].upper(), int(payload["Quantity"]), stop_price, conditional_order_id)
+    self.orders[order.order_id] = order
+    return order
+
+  def fill(self, order_id: str, price: float = None):
+    with self.lock:
+      order = self.orders[order_id]
+      if order.is_terminal:
+        return
+      if order.open_or_close == "Close" and self.rng.random() < self.reject_rate:
+        order.status = "REJ"
+        self.emit(order)
+        return
+      if price is None:
+        price = self.price(order.symbol) + 0.01 * order.side_factor
+      order.status = "FLL"
+      order.exec_quantity = order.quantity
+      order.filled_price = round(price, 2)
+      self.emit(order)
+      self.update_position(order)
+      for child in self.orders.values():
+        if child.conditional_order_id == order.order_id and not child.is_terminal:
+          child.working = True
+
+  def trigger_stops(self, symbol: str, price: float):
+    for order in list(self.orders.values()):
+      if order.working and order.symbol == symbol and not order.is_terminal and order.stop_price is not None:
+        if (order.side_factor == -1 and price <= order.stop_price) or (order.side_factor == 1 and price >= order.stop_price):
+          order.status = "FLL"
+          order.exec_quantity = order.quantity
+          order.filled_price = price
+          self.emit(order)
+          self.update_position(order)
+
+  def update_position(self, order: FakeOrder):
+    position = self.positions.get(order.symbol)
+    if position is None:
+      position = self.positions[order.symbol] = { "PositionID": str(self.next_position_id), "AccountID": self.accounts[0]["AccountID"], "Symbol": order.symbol, "AssetType": "STOCK", "Quantity": 0, "AveragePrice": 0.0 }
+      self.next_position_id += 1
+    quantity = position["Quantity"] + order.exec_quantity * order.side_factor
+    if quantity and abs(quantity) > abs(position["Quantity"]):
+      position["AveragePrice"] = (position["AveragePrice"] * abs(position["Quantity"]) + order.filled_price * order.exec_quantity) / abs(quantity)
+    position["Quantity"] = quantity
+    if quantity == 0:
+      del self.positions[order.symbol]
+      self.publish(self.position_listeners, { "PositionID": position["PositionID"], "Deleted": True })
+      return
+    self.publish(self.position_listeners, self.position_json(position))
+
+  def position_json(self, position: dict):
+    quantity = position["Quantity"]
+    last = self.price(position["Symbol"])
+    return {
+      **position,
+      "Quantity": str(abs(quantity)),
+      "LongShort": "Long" if quantity > 0 else "Short",
+      "AveragePrice": f"{position['AveragePrice']:.2f}",
+      "Last": f"{last:.2f}",
+      "UnrealizedProfitLoss": f"{(last - position['AveragePrice']) * quantity:.2f}",
+      "Timestamp": now()
+    }
+
+  def snapshot(self):
+    with self.lock:
+      return [order.to_json() for order in self.orders.values()], [self.position_json(position) for position in self.positions.values()]
+
+  def drop_streams(self):
+    with self.lock:
+      self.stream_generation += 1
+      for listener in self.order_listeners + self.position_listeners:
+        listener.put(None)
+
+  def replace_order(self, order_id: str, payload: dict):
+    with self.lock:
+      order = self.orders.get(order_id)
+      if order is None or order.is_terminal:
+        return None
+      order.quantity = int(payload.get("Quantity", order.quantity))
+      if "StopPrice" in payload:
+        order.stop_price = float(payload["StopPrice"])
+      self.emit(order)
+    return { "OrderID": order_id, "Message": "Cancel/Replace order sent" }
+
+  def cancel_order(self, order_id: str):
+    with self.lock:
+      order = self.orders.get(order_id)
+      if order is None or order.is_terminal:
+        return None
+      order.status = "OUT"
+      self.emit(order)
+    return { "OrderID": order_id, "Message": "Cancel request sent" }
+
+
+class FakeTradeStationHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  disable_nagle_algorithm = True
+
+  @property
+  def broker(self) -> FakeBroker:
+    return self.server.broker
+
+  def log_message(self, *args):
+    pass
+
+  def read_json(self):
+    body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    return json.loads(body) if body else {}
+
+  def send_json(self, body: dict, status=200):
+    data = dumps(body)
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(data)))
+    self.end_headers()
+    self.wfile.write(data)
+
+  def send_not_found(self):
+    self.send_json({ "Error": "NotFound", "Message": f"no route for {self.command} {self.path}" }, 404)
+
+  def start_stream(self):
+    self.send_response(200)
+    self.send_header("Content-Type", "application/vnd.tradestation.streams.v2+json")
+    self.send_header("Transfer-Encoding", "chunked")
+    self.end_headers()
+
+  def write_chunk(self, data: bytes):
+    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+    self.wfile.flush()
+
+  def do_GET(self):
+    url = urlparse(self.path)
+    parts = url.path.strip("/").split("/")
+    if parts == ["v3", "brokerage", "accounts"]:
+      self.send_json({ "Accounts": self.broker.accounts })
+    elif parts[:3] == ["v3", "brokerage", "accounts"] and len(parts) == 5 and parts[4] in ("orders", "positions"):
+      orders, positions = self.broker.snapshot()
+      self.send_json({ "Orders": orders, "Errors": [] } if parts[4] == "orders" else { "Positions": positions, "Errors": [] })
+    elif parts[:3] == ["v3", "brokerage", "stream"] and len(parts) == 6 and parts[5] in ("orders", "positions"):
+      self.stream_events(self.broker.order_listeners if parts[5] == "orders" else self.broker.position_listeners)
+    elif parts[:4] == ["v3", "marketdata", "stream", "quotes"] and len(parts) == 5:
+      rate = float(parse_qs(url.query).get("rate", [self.broker.quote_rate])[0])
+      self.stream_quotes([symbol.upper() for symbol in parts[4].split(",") if symbol], rate)
+    elif parts[:3] == ["v3", "marketdata", "symbols"] and len(parts) == 4:
+      symbols = [{ "Symbol": symbol.upper(), "AssetType": "STOCK", "Currency": "USD", "Exchange": "NYSE", "Description": f"{symbol.upper()} fake" } for symbol in parts[3].split(",")]
+      self.send_json({ "Symbols": symbols, "Errors": [] })
+    elif parts == ["v3", "orderexecution", "routes"]:
+      self.send_json({ "Routes": [{ "Id": "Intelligent", "Name": "Intelligent", "AssetTypes": ["STOCK"] }] })
+    else:
+      self.send_not_found()
+
+  def do_POST(self):
+    path = urlparse(self.path).path.rstrip("/")
+    if path.startswith("/v3/orderexecution"):
+      time.sleep(self.broker.order_latency)
+    if path == "/oauth/token":
+      form = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+      refresh_token = form.get("refresh_token", ["fake-refresh-token"])[0]
+      self.send_json({ "access_token": f"fake-access-{time.time_ns()}", "refresh_token": refresh_token, "expires_in": 1200, "token_type": "Bearer" })
+    elif path == "/v3/orderexecution/orders":
+      self.send_json(self.broker.place_order(self.read_json()))
+    elif path == "/fake/drop-streams":
+      self.broker.drop_streams()
+      self.send_json({ "Message": "streams dropped" })
+    else:
+      self.send_not_found()
+
+  def do_PUT(self):
+    parts = urlparse(self.path).path.strip("/").split("/")
+    time.sleep(self.broker.order_latency)
+    if parts[:3] == ["v3", "orderexecution", "orders"] and len(parts) == 4:
+      self.send_order_result(self.broker.replace_order(parts[3], self.read_json()), parts[3])
+    else:
+      self.send_not_found()
+
+  def do_DELETE(self):
+    parts = urlparse(self.path).path.strip("/").split("/")
+    time.sleep(self.broker.order_latency)
+    if parts[:3] == ["v3", "orderexecution", "orders"] and len(parts) == 4:
+      self.send_order_result(self.broker.cancel_order(parts[3]), parts[3])
+    else:
+      self.send_not_found()
+
+  def send_order_result(self, result: dict, order_id: str):
+    if result is None:
+      self.send_json({ "Error": "FAILED", "Message": f"order {order_id} is not open" }, 400)
+    else:
+      self.send_json(result)
+
+  def stream_events(self, listeners: list[SimpleQueue]):
+    queue = SimpleQueue()
+    listeners.append(queue)
+    self.start_stream()
+    heartbeat = 0
+    try:
+      while not self.broker.stopped.is_set():
+        try:
+          lines = [queue.get(timeout=self.broker.heartbeat_interval)]
+        except Empty:
+          heartbeat += 1
+          self.write_chunk(dumps({ "Heartbeat": heartbeat, "Timestamp": now() }) + b"\n")
+          continue
+        while not queue.empty():
+          lines.append(queue.get())
+        if None in lines:
+          self.close_connection = True
+          return
+        self.write_chunk(b"".join(line + b"\n" for line in lines))
+    except (BrokenPipeError, ConnectionResetError):
+      pass
+    finally:
+      listeners.remove(queue)
+
+  def stream_quotes(self, symbols: list[str], rate: float, batch_interval=0.01):
+    self.start_stream()
+    try:
+      with self.broker.lock:
+        snapshots = [self.broker.quote(symbol) for symbol in symbols]
+      self.write_chunk(b"".join(dumps(quote) + b"\n" for quote in snapshots))
+      index = 0
+      batch_size = max(1, round(rate * batch_interval)) if rate > 0 else 100
+      next_batch_at = time.perf_counter()
+      generation = self.broker.stream_generation
+      while not self.broker.stopped.is_set():
+        if generation != self.broker.stream_generation:
+          self.close_connection = True
+          return
+        lines = []
+        for _ in range(batch_size):
+          lines.append(dumps(self.broker.tick(symbols[index % len(symbols)])) + b"\n")
+          index += 1
+        self.write_chunk(b"".join(lines))
+        if rate > 0:
+          next_batch_at += batch_size / rate
+          delay = next_batch_at - time.perf_counter()
+          if delay > 0:
+            time.sleep(delay)
+    except (BrokenPipeError, ConnectionResetError):
+      pass
+
+
+def serve(broker: FakeBroker = None, host="127.0.0.1", port=0):
+  server = ThreadingHTTPServer((host, port), FakeTradeStationHandler)
+  server.broker = broker or FakeBroker()
+  Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="local stand-in for the TradeStation endpoints used by quick-trades")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=8765)
+  parser.add_argument("--quote-rate", type=float, default=10, help="quote messages/sec per stream, 0 for as fast as possible")
+  parser.add_argument("--fill-delay", type=float, default=0.05, help="seconds before market orders fill")
+  parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of closing market orders rejected on the order stream")
+  parser.add_argument("--order-latency", type=float, default=0.0, help="seconds the order endpoints take to answer")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+
+  server = serve(FakeBroker(args.quote_rate, args.fill_delay, seed=args.seed, reject_rate=args.reject_rate, order_latency=args.order_latency), args.host, args.port)
+  print(f"fake tradestation on http://{args.host}:{server.server_address[1]}")
+  print(f"set API_URL=http://{args.host}:{server.server_address[1]}/v3 and SIGNIN_URL=http://{args.host}:{server.server_address[1]}")
+  try:
+    while True:
+      time.sleep(1)
+  except KeyboardInterrupt:
+    server.broker.stopped.set()
+    server.shutdown()
@@ -0,0 +1,94 @@
+import time
+from threading import Event, Thread, local
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from event_log import event_log
+
+connect_timings = local()
+
+
+class TimedConnection:
+  def connect(self):
+    start = time.perf_counter()
+    super().connect()
+    connect_timings.seconds = getattr(connect_timings, "seconds", 0) + time.perf_counter() - start
+
+
+class TimedHTTPConnection(TimedConnection, HTTPConnection):
+  pass
+
+
+class TimedHTTPSConnection(TimedConnection, HTTPSConnection):
+  pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+  ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+  ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+  def init_poolmanager(self, *args, **kwargs):
+    super().init_poolmanager(*args, **kwargs)
+    self.poolmanager.pool_classes_by_scheme = { "http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool }
+
+
+class ApiClient:
+  def __init__(self, access_token: Callable[[], str], pool_size=10, timeout=(3.05, 10), prewarm_url: str = None, prewarm_interval=30):
+    self.access_token = access_token
+    self.timeout = timeout
+    self.prewarm_url = prewarm_url
+    self.prewarm_interval = prewarm_interval
+    self.session = requests.Session()
+    adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    self.session.mount("https://", adapter)
+    self.session.mount("http://", adapter)
+    self.closed = Event()
+
+  def request(self, method: str, url: str, auth=True, headers: dict = None, timeout=None, **kwargs) -> requests.Response:
+    headers = dict(headers or {})
+    if auth:
+      headers["Authorization"] = f"Bearer {self.access_token()}"
+    connect_timings.seconds = 0
+    start = time.perf_counter()
+    response = self.session.request(method, url, headers=headers, timeout=timeout or self.timeout, **kwargs)
+    response.total_ms = (time.perf_counter() - start) * 1000
+    response.connect_ms = connect_timings.seconds * 1000
+    response.server_ms = response.elapsed.total_seconds() * 1000 - response.connect_ms
+    return response
+
+  def get(self, url: str, **kwargs):
+    return self.request("GET", url, **kwargs)
+
+  def post(self, url: str, **kwargs):
+    return self.request("POST", url, **kwargs)
+
+  def put(self, url: str, **kwargs):
+    return self.request("PUT", url, **kwargs)
+
+  def delete(self, url: str, **kwargs):
+    return self.request("DELETE", url, **kwargs)
+
+  def start_prewarming(self):
+    if self.prewarm_url:
+      Thread(target=self.run_prewarm, daemon=True).start()
+
+  def run_prewarm(self):
+    while not self.closed.is_set():
+      try:
+        self.get(self.prewarm_url)
+      except Exception as e:
+        event_log.warning("prewarm_error", url=self.prewarm_url, error=repr(e))
+      self.closed.wait(self.prewarm_interval)
+
+  def close(self):
+    self.closed.set()
+    self.session.close()
@@ -37,21 +37,62 @@ class Position:
   def unrealized(self):
     return float(self.position_json["UnrealizedProfitLoss"])
 
-class Quote:
-  def __init__(self, quote_json):
-    self.position_json = quote_json
-
-  def update_quote(self, quote_change):
-    self.position_json = { **self.position_json, **quote_change }
-
   @property
-  def bid(self):
-    return float(self.position_json.get("Bid") or self.position_json["Last"])
+  def shares(self):
+    return int(self.quantity) * (1 if self.long_short == "Long" else -1)
 
   @property
-  def ask(self):
-    return float(self.position_json.get("Ask") or self.position_json["Last"])
+  def last(self):
+    return float(self.position_json["Last"])
 
+class Quote:
+  __slots__ = ("symbol", "bid", "ask", "last", "bid_size", "ask_size", "last_size", "trade_time", "quoted_bid", "quoted_ask")
+
+  def __init__(self, quote_json: dict):
+    self.symbol = quote_json.get("Symbol")
+    self.last = None
+    self.quoted_bid = None
+    self.quoted_ask = None
+    self.bid_size = 0
+    self.ask_size = 0
+    self.last_size = 0
+    self.trade_time = None
+    self.update_quote(quote_json)
+
+  def update_quote(self, quote_change: dict):
+    get = quote_change.get
+    last = get("Last")
+    if last:
+      self.last = float(last)
+    if "Bid" in quote_change:
+      bid = quote_change["Bid"]
+      self.quoted_bid = float(bid) if bid else None
+    if "Ask" in quote_change:
+      ask = quote_change["Ask"]
+      self.quoted_ask = float(ask) if ask else None
+    bid_size = get("BidSize")
+    if bid_size:
+      self.bid_size = int(bid_size)
+    ask_size = get("AskSize")
+    if ask_size:
+      self.ask_size = int(ask_size)
+    last_size = get("LastSize")
+    if last_size:
+      self.last_size = int(last_size)
+    trade_time = get("TradeTime")
+    if trade_time:
+      self.trade_time = trade_time
+    self.bid = self.last if self.quoted_bid is None else self.quoted_bid
+    self.ask = self.last if self.quoted_ask is None else self.quoted_ask
+
+
+def update_quotes(quotes: dict[str, Quote], quote_json: dict):
+  symbol = quote_json["Symbol"]
+  if symbol in quotes:
+    quotes[symbol].update_quote(quote_json)
+  else:
+    quotes[symbol] = Quote(quote_json)
+  return quotes[symbol]
 
 
 EnterAction = Literal["BUY", "SELLSHORT"]
@@ -0,0 +1,78 @@
+import numpy as np
+
+from interface import Quote
+from trade_history import Trade
+
+
+class PositionVectors:
+  def __init__(self, trades: list[Trade], quotes: dict[str, Quote]):
+    size = len(trades)
+    self.symbols = [trade.symbol for trade in trades]
+    self.index = { symbol: row for row, symbol in enumerate(self.symbols) }
+    self.avg_entry = np.empty(size)
+    self.shares = np.empty(size)
+    self.stop = np.full(size, np.nan)
+    self.side_factor = np.empty(size)
+    self.risk = np.full(size, np.nan)
+    self.bid = np.full(size, np.nan)
+    self.ask = np.full(size, np.nan)
+    for row, trade in enumerate(trades):
+      self.avg_entry[row] = trade.entry_amount / trade.entry_quantity
+      self.shares[row] = trade.opened_shares
+      self.side_factor[row] = trade.side_factor
+      self.set_stop(row, trade)
+      quote = quotes.get(trade.symbol)
+      if quote is not None:
+        self.bid[row] = quote.bid
+        self.ask[row] = quote.ask
+
+  def set_stop(self, row: int, trade: Trade):
+    self.risk[row] = trade.risk_amount / trade.entry_quantity if trade.initial_stop_order is not None else np.nan
+    stop_order = trade.latest_stop_order
+    self.stop[row] = stop_order.stop_price if stop_order is not None and stop_order.stop_price else np.nan
+
+
+class LivePnL:
+  def __init__(self, quotes: dict[str, Quote]):
+    self.quotes = quotes
+    self.vectors = PositionVectors([], quotes)
+
+  def rebuild(self, positions: dict[str, Trade]):
+    self.vectors = PositionVectors([trade for trade in positions.values() if trade.entry_quantity > 0], self.quotes)
+
+  def update_quote(self, quote: Quote):
+    vectors = self.vectors
+    row = vectors.index.get(quote.symbol)
+    if row is None:
+      return False
+    vectors.bid[row] = quote.bid
+    vectors.ask[row] = quote.ask
+    return True
+
+  def update_stop(self, trade: Trade):
+    vectors = self.vectors
+    row = vectors.index.get(trade.symbol)
+    if row is None:
+      return False
+    vectors.set_stop(row, trade)
+    return True
+
+  def compute(self, vectors: PositionVectors = None):
+    vectors = vectors or self.vectors
+    exit_price = np.where(vectors.side_factor == 1, vectors.bid, vectors.ask)
+    per_share = (exit_price - vectors.avg_entry) * vectors.side_factor
+    unrealized = per_share * vectors.shares
+    reward = per_share / vectors.risk
+    stop_distance = (exit_price - vectors.stop) * vectors.side_factor
+    return vectors.symbols, unrealized, reward, stop_distance
+
+  def render(self):
+    vectors = self.vectors
+    symbols, unrealized, reward, stop_distance = self.compute(vectors)
+    if not symbols:
+      return "no open positions"
+    shares = (vectors.shares * vectors.side_factor).astype(int)
+    rows = zip(symbols, shares.tolist(), unrealized.tolist(), reward.tolist(), stop_distance.tolist())
+    lines = [f"{symbol:6} {quantity:>6} {pnl:>9.2f} {r:>6.2f}R {distance:>7.2f}" for symbol, quantity, pnl, r, distance in rows]
+    lines.append(f"{'total':6} {'':>6} {float(np.nansum(unrealized)):>9.2f} {float(np.nansum(reward)):>6.2f}R")
+    return "\n".join(lines)
@@ -1,10 +1,16 @@
-
-from trading_app import TradingApp
+import os
+import sys
+from startup_profile import startup_profile
 
 if __name__ == "__main__":
-  
+  startup_profile.enabled = "--profile-startup" in sys.argv or os.environ.get("STARTUP_PROFILE") == "1"
+  with startup_profile.phase("import"):
+    from trading_app import TradingApp
 
-  app = TradingApp()
+  with startup_profile.phase("window"):
+    app = TradingApp()
+  app.after_idle(startup_profile.mark, "interactive")
   app.mainloop()
   print('ending streams and app')
-  app.enable_streaming = False
\ No newline at end of file
+  app.enable_streaming = False
+  startup_profile.report()
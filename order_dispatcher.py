@@ -0,0 +1,111 @@
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Literal
+
+from event_log import event_log
+
+IntentStatus = Literal["queued", "sending", "sent", "rejected", "failed"]
+
+
+class OrderRejected(Exception):
+  pass
+
+
+class OrderIntent:
+  def __init__(self, key: str, symbol: str, description: str, send: Callable[[], Any]):
+    self.key = key
+    self.symbol = symbol
+    self.description = description
+    self.send = send
+    self.status: IntentStatus = "queued"
+    self.detail = ""
+    self.duplicates = 0
+    self.future = Future()
+    self.created_at = time.time()
+    self.finished_at: float = None
+
+  @property
+  def is_pending(self):
+    return not self.future.done()
+
+  def __repr__(self) -> str:
+    duplicates = f" (+{self.duplicates} ignored)" if self.duplicates else ""
+    return f"{time.strftime('%H:%M:%S', time.localtime(self.created_at))} {self.status:8} {self.description}{duplicates} {self.detail}".rstrip()
+
+
+class OrderDispatcher:
+  def __init__(self, workers=4, dedupe_window=1.0, history_size=50, on_status: Callable[[OrderIntent], None] = None):
+    self.executor = ThreadPoolExecutor(workers, thread_name_prefix="orders")
+    self.dedupe_window = dedupe_window
+    self.on_status = on_status
+    self.lanes: dict[str, deque[OrderIntent]] = defaultdict(deque)
+    self.busy_symbols: set[str] = set()
+    self.intents: dict[str, OrderIntent] = {}
+    self.history: deque[OrderIntent] = deque(maxlen=history_size)
+    self.lock = Lock()
+
+  def submit(self, key: str, symbol: str, description: str, send: Callable[[], Any]):
+    with self.lock:
+      existing = self.intents.get(key)
+      if existing and (existing.is_pending or time.time() - existing.created_at < self.dedupe_window):
+        existing.duplicates += 1
+        intent = existing
+      else:
+        intent = self.intents[key] = OrderIntent(key, symbol, description, send)
+        self.history.appendleft(intent)
+        self.lanes[symbol].append(intent)
+        if symbol not in self.busy_symbols:
+          self.busy_symbols.add(symbol)
+          self.executor.submit(self.drain, symbol)
+    self.notify(intent)
+    return intent
+
+  def drain(self, symbol: str):
+    while True:
+      with self.lock:
+        lane = self.lanes[symbol]
+        if not lane:
+          self.busy_symbols.discard(symbol)
+          del self.lanes[symbol]
+          return
+        intent = lane.popleft()
+      self.run(intent)
+
+  def run(self, intent: OrderIntent):
+    intent.status = "sending"
+    self.notify(intent)
+    try:
+      result = intent.send()
+      intent.status = "sent"
+      intent.detail = str(result or "")
+      intent.future.set_result(result)
+    except OrderRejected as e:
+      intent.status = "rejected"
+      intent.detail = str(e)
+      intent.future.set_exception(e)
+    except Exception as e:
+      event_log.error("order_send_error", intent=intent.description, error=repr(e))
+      intent.status = "failed"
+      intent.detail = str(e)
+      intent.future.set_exception(e)
+    intent.finished_at = time.time()
+    self.notify(intent)
+    self.forget_expired()
+
+  def forget_expired(self):
+    expired_before = time.time() - self.dedupe_window
+    with self.lock:
+      for key in [key for key, intent in self.intents.items() if not intent.is_pending and intent.created_at < expired_before]:
+        del self.intents[key]
+
+  def notify(self, intent: OrderIntent):
+    if self.on_status:
+      self.on_status(intent)
+
+  def recent(self):
+    return list(self.history)
+
+  def close(self, wait=True):
+    self.executor.shutdown(wait=wait, cancel_futures=not wait)
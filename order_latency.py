@@ -0,0 +1,126 @@
+import csv
+import os
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime
+from itertools import count
+from threading import Lock
+
+from event_log import event_log
+from trade_history import Order
+
+accepted_statuses = { "ACK", "DON", "OPN", "FLP", "FLL" }
+percentiles = (50, 95, 99)
+
+
+class OrderTimeline:
+  def __init__(self, order_type: str):
+    self.order_type = order_type
+    self.stages: dict[str, float] = { "click": time.perf_counter() }
+    self.order_ids: list[str] = []
+
+
+class OrderLatency:
+  def __init__(self, window=1000, max_pending=1000):
+    self.window = window
+    self.max_pending = max_pending
+    self.timelines: OrderedDict[int, OrderTimeline] = OrderedDict()
+    self.timeline_by_order_id: dict[str, OrderTimeline] = {}
+    self.order_stages: dict[str, set[str]] = defaultdict(set)
+    self.samples: dict[tuple[str, str], deque] = defaultdict(lambda: deque(maxlen=self.window))
+    self.refs = count()
+    self.lock = Lock()
+
+  def start(self, order_type: str):
+    with self.lock:
+      ref = next(self.refs)
+      self.timelines[ref] = OrderTimeline(order_type)
+      while len(self.timelines) > self.max_pending:
+        _, expired = self.timelines.popitem(last=False)
+        self.forget(expired.order_ids)
+      return ref
+
+  def mark(self, ref: int, stage: str):
+    now = time.perf_counter()
+    with self.lock:
+      timeline = self.timelines.get(ref)
+      if timeline is None:
+        return
+      timeline.stages[stage] = now
+      if stage == "payload":
+        self.record(timeline.order_type, "click_to_payload", now - timeline.stages["click"])
+      elif stage == "send":
+        self.record(timeline.order_type, "click_to_send", now - timeline.stages["click"])
+        if "payload" in timeline.stages:
+          self.record(timeline.order_type, "payload_to_send", now - timeline.stages["payload"])
+      elif stage == "response" and "send" in timeline.stages:
+        self.record(timeline.order_type, "send_to_response", now - timeline.stages["send"])
+
+  def link(self, ref: int, order_id: str):
+    with self.lock:
+      timeline = self.timelines.get(ref)
+      if timeline is not None:
+        self.timeline_by_order_id[order_id] = timeline
+        timeline.order_ids.append(order_id)
+
+  def observe(self, order: Order):
+    now = time.perf_counter()
+    with self.lock:
+      timeline = self.timeline_by_order_id.get(order.order_id)
+      if timeline is None:
+        for order_id in order.conditional_order_ids:
+          if order_id in self.timeline_by_order_id:
+            timeline = self.timeline_by_order_id[order_id]
+            self.timeline_by_order_id[order.order_id] = timeline
+            timeline.order_ids.append(order.order_id)
+            break
+        else:
+          return
+      stages = self.order_stages[order.order_id]
+      click = timeline.stages["click"]
+      if "first_seen" not in stages:
+        stages.add("first_seen")
+        self.record(order.order_type, "click_to_first_seen", now - click)
+      if "accepted" not in stages and order.status in accepted_statuses:
+        stages.add("accepted")
+        timeline.stages[f"{order.order_id}_accepted"] = now
+        self.record(order.order_type, "click_to_ack", now - click)
+      if "filled" not in stages and order.is_filled:
+        stages.add("filled")
+        self.record(order.order_type, "click_to_fill", now - click)
+        accepted = timeline.stages.get(f"{order.order_id}_accepted")
+        if accepted is not None:
+          self.record(order.order_type, "ack_to_fill", now - accepted)
+      if order.is_terminal:
+        self.forget([order.order_id])
+
+  def forget(self, order_ids: list[str]):
+    for order_id in order_ids:
+      self.timeline_by_order_id.pop(order_id, None)
+      self.order_stages.pop(order_id, None)
+
+  def record(self, order_type: str, metric: str, seconds: float):
+    self.samples[(order_type, metric)].append(seconds * 1000)
+
+  def histograms(self):
+    with self.lock:
+      samples = { key: sorted(values) for key, values in self.samples.items() }
+    histograms = {}
+    for key, values in samples.items():
+      histograms[key] = { f"p{p}": values[min(len(values) - 1, len(values) * p // 100)] for p in percentiles }
+      histograms[key]["count"] = len(values)
+    return histograms
+
+  def export(self, path: str):
+    histograms = self.histograms()
+    if not histograms:
+      return
+    is_new = not os.path.exists(path)
+    session = datetime.now().isoformat(timespec="seconds")
+    with open(path, "a", newline="") as file:
+      writer = csv.writer(file)
+      if is_new:
+        writer.writerow(["session", "order_type", "metric", "count"] + [f"p{p}_ms" for p in percentiles])
+      for (order_type, metric), histogram in sorted(histograms.items()):
+        writer.writerow([session, order_type, metric, histogram["count"]] + [round(histogram[f"p{p}"], 1) for p in percentiles])
+    event_log.info("order_latency_exported", path=path, metrics=len(histograms))
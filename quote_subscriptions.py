@@ -0,0 +1,115 @@
+import time
+from threading import Lock
+from typing import Any, Callable
+
+from decoding import decode_quote
+from event_log import event_log
+from interface import Quote, update_quotes
+from streaming import StreamingEngine
+
+
+class QuoteShard:
+  def __init__(self, index: int):
+    self.index = index
+    self.symbols: set[str] = set()
+    self.active_stream: str = None
+    self.pending_stream: str = None
+    self.switch_requested_at: float = None
+    self.last_message_at: float = None
+
+
+class QuoteSubscriptions:
+  def __init__(self, streaming: StreamingEngine, url: Callable[[str], str], headers: Callable[[], dict], callback: Callable[[Quote], None], quotes: dict[str, Quote], shard_count=1, decode: Callable[[bytes], Any] = decode_quote):
+    self.streaming = streaming
+    self.url = url
+    self.headers = headers
+    self.callback = callback
+    self.quotes = quotes
+    self.decode = decode
+    self.shards = [QuoteShard(index) for index in range(shard_count)]
+    self.generation = 0
+    self.lock = Lock()
+    self.switches = 0
+    self.last_switch_ms = 0
+    self.max_switch_ms = 0
+    self.max_gap_ms = 0
+    self.closed_reconnects = 0
+
+  @property
+  def symbols(self):
+    return set().union(*[shard.symbols for shard in self.shards])
+
+  def update(self, symbols: set[str]):
+    with self.lock:
+      current_symbols = self.symbols
+      changed_shards = set()
+      for shard in self.shards:
+        removed = shard.symbols - symbols
+        if removed:
+          shard.symbols -= removed
+          changed_shards.add(shard.index)
+      for symbol in sorted(symbols - current_symbols):
+        shard = min(self.shards, key=lambda shard: len(shard.symbols))
+        shard.symbols.add(symbol)
+        changed_shards.add(shard.index)
+      for index in changed_shards:
+        self.switch_shard(self.shards[index])
+
+  def switch_shard(self, shard: QuoteShard):
+    if shard.pending_stream:
+      self.close(shard.pending_stream)
+      shard.pending_stream = None
+    if not shard.symbols:
+      if shard.active_stream:
+        self.close(shard.active_stream)
+        shard.active_stream = None
+      return
+    self.generation += 1
+    name = f"quotes-{shard.index}-{self.generation}"
+    symbols = ",".join(sorted(shard.symbols))
+    event_log.info("quote_subscribe", stream=name, symbols=symbols)
+    shard.switch_requested_at = time.monotonic()
+    # the current stream keeps delivering until the new one sends its first message
+    shard.pending_stream = name
+    self.streaming.subscribe(name, lambda: self.url(symbols), self.headers, lambda message: self.on_message(shard, name, message), self.decode)
+
+  def on_message(self, shard: QuoteShard, name: str, message: dict):
+    now = time.monotonic()
+    with self.lock:
+      if name == shard.pending_stream:
+        switch_ms = (now - shard.switch_requested_at) * 1000
+        self.switches += 1
+        self.last_switch_ms = switch_ms
+        self.max_switch_ms = max(self.max_switch_ms, switch_ms)
+        if shard.active_stream:
+          self.close(shard.active_stream)
+        shard.active_stream = name
+        shard.pending_stream = None
+      elif name != shard.active_stream:
+        return
+      if shard.last_message_at is not None:
+        self.max_gap_ms = max(self.max_gap_ms, (now - shard.last_message_at) * 1000)
+      shard.last_message_at = now
+    # only the active stream of a shard writes into the shared quote store
+    self.callback(update_quotes(self.quotes, message))
+
+  def close(self, name: str):
+    stream = self.streaming.streams.get(name)
+    if stream:
+      self.closed_reconnects += max(stream.connects - 1, 0)
+    self.streaming.unsubscribe(name)
+
+  @property
+  def reconnects(self):
+    open_streams = [self.streaming.streams.get(shard.active_stream) for shard in self.shards]
+    return self.closed_reconnects + sum(max(stream.connects - 1, 0) for stream in open_streams if stream)
+
+  def metrics(self):
+    return {
+      "streams": sum(1 for shard in self.shards if shard.active_stream),
+      "switches": self.switches,
+      "reconnects": self.reconnects,
+      "last_switch_ms": round(self.last_switch_ms, 1),
+      "max_switch_ms": round(self.max_switch_ms, 1),
+      "max_gap_ms": round(self.max_gap_ms, 1)
+    }
@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+
+class StartupProfile:
+  def __init__(self):
+    self.enabled = False
+    self.started_at = time.perf_counter()
+    self.phases: dict[str, tuple[float, float]] = {}
+    self.lock = Lock()
+
+  @contextmanager
+  def phase(self, name: str):
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.record(name, start, time.perf_counter())
+
+  def mark(self, name: str):
+    if name not in self.phases:
+      now = time.perf_counter()
+      self.record(name, now, now)
+
+  def record(self, name: str, start: float, end: float):
+    with self.lock:
+      if name in self.phases:
+        return
+      self.phases[name] = (start - self.started_at, end - start)
+    if self.enabled:
+      print(f"[startup] {name}: {(end - start) * 1000:.0f}ms, done at {(end - self.started_at) * 1000:.0f}ms")
+
+  def report(self):
+    if not self.enabled:
+      return
+    print("startup profile:")
+    with self.lock:
+      phases = sorted(self.phases.items(), key=lambda phase: phase[1][0])
+    for name, (offset, duration) in phases:
+      print(f"  {name:24} start {offset * 1000:7.0f}ms  took {duration * 1000:7.0f}ms  done {(offset + duration) * 1000:7.0f}ms")
+
+
+startup_profile = StartupProfile()
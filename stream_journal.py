@@ -0,0 +1,91 @@
+import argparse
+import gzip
+import time
+from queue import SimpleQueue
+from threading import Thread
+
+from decoding import decode_order, decode_quote
+from interface import Quote, update_quotes
+from trade_history import TradeHistory
+
+
+class StreamJournal:
+  def __init__(self, path: str, flush_interval=1.0):
+    self.path = path
+    self.flush_interval = flush_interval
+    self.queue = SimpleQueue()
+    self.thread = Thread(target=self.run, daemon=True)
+    self.thread.start()
+
+  def write(self, stream: str, line: bytes):
+    self.queue.put((time.monotonic_ns(), stream, line))
+
+  def run(self):
+    with gzip.open(self.path, "ab") as file:
+      flushed_at = time.monotonic()
+      while True:
+        record = self.queue.get()
+        if record is None:
+          break
+        received_at, stream, line = record
+        file.write(b"%d\t%s\t%s\n" % (received_at, stream.encode(), line))
+        if time.monotonic() - flushed_at > self.flush_interval:
+          file.flush()
+          flushed_at = time.monotonic()
+
+  def close(self, timeout=5):
+    self.queue.put(None)
+    self.thread.join(timeout)
+
+
+def read_journal(path: str):
+  with gzip.open(path, "rb") as file:
+    for record in file:
+      received_at, stream, line = record.rstrip(b"\n").split(b"\t", 2)
+      yield int(received_at), stream.decode(), line
+
+
+def replay(path: str, speed: float = None, trade_history: TradeHistory = None, quotes: dict[str, Quote] = None):
+  trade_history = trade_history if trade_history is not None else TradeHistory()
+  quotes = quotes if quotes is not None else {}
+  counts = { "orders": 0, "quotes": 0, "skipped": 0 }
+  first_received_at = None
+  start = time.perf_counter()
+  for received_at, stream, line in read_journal(path):
+    if first_received_at is None:
+      first_received_at = received_at
+    if speed:
+      delay = (received_at - first_received_at) / 1e9 / speed - (time.perf_counter() - start)
+      if delay > 0:
+        time.sleep(delay)
+    if stream.startswith("orders"):
+      order = decode_order(line)
+      if order:
+        trade_history.append(order)
+        counts["orders"] += 1
+    elif stream.startswith("quotes"):
+      quote = decode_quote(line)
+      if quote:
+        update_quotes(quotes, quote)
+        counts["quotes"] += 1
+    else:
+      counts["skipped"] += 1
+  elapsed = time.perf_counter() - start
+  messages = counts["orders"] + counts["quotes"]
+  return {
+    **counts,
+    "elapsed": round(elapsed, 3),
+    "messages_per_sec": round(messages / elapsed) if elapsed else None,
+    "trade_history": trade_history
+  }
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="replay a recorded stream journal without network")
+  parser.add_argument("path")
+  parser.add_argument("--speed", default="max", help="replay speed multiplier, e.g. 1, 10, or max")
+  args = parser.parse_args()
+
+  result = replay(args.path, None if args.speed == "max" else float(args.speed))
+  print(result.pop("trade_history"))
+  print(result)
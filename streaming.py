@@ -0,0 +1,150 @@
+import asyncio
+import random
+from threading import Event, Thread
+from typing import Any, Callable
+
+from decoding import loads
+from event_log import event_log
+
+
+class Stream:
+  def __init__(self, name: str, url: Callable[[], str], headers: Callable[[], dict], callback: Callable[[Any], None], decode: Callable[[bytes], Any] = loads, on_reconnect: Callable[[], None] = None):
+    self.name = name
+    self.url = url
+    self.headers = headers
+    self.callback = callback
+    self.decode = decode
+    self.on_reconnect = on_reconnect
+    self.queue: asyncio.Queue = None
+    self.reader: asyncio.Task = None
+    self.dispatcher: asyncio.Task = None
+    self.messages_received = 0
+    self.connects = 0
+
+  @property
+  def is_open(self):
+    return self.reader is not None and not self.reader.done()
+
+
+class StreamingEngine:
+  def __init__(self, queue_size=1000, retry_delay=1, max_retry_delay=30, jitter=0.2):
+    self.queue_size = queue_size
+    self.retry_delay = retry_delay
+    self.max_retry_delay = max_retry_delay
+    self.jitter = jitter
+    self.streams: dict[str, Stream] = {}
+    self.loop = asyncio.new_event_loop()
+    self.thread = Thread(target=self.run, daemon=True)
+    self.ready = Event()
+    self.session = None
+    self.stopped: asyncio.Event = None
+    self.journal = None
+
+  def start(self):
+    self.thread.start()
+
+  def stop(self, timeout=5):
+    if self.thread.is_alive() and self.ready.wait(timeout):
+      self.loop.call_soon_threadsafe(self.stopped.set)
+      self.thread.join(timeout)
+
+  def subscribe(self, name: str, url: Callable[[], str], headers: Callable[[], dict], callback: Callable[[Any], None], decode: Callable[[bytes], Any] = loads, on_reconnect: Callable[[], None] = None):
+    stream = Stream(name, url, headers, callback, decode, on_reconnect)
+    self.streams[name] = stream
+    if self.ready.is_set():
+      self.loop.call_soon_threadsafe(self.open_stream, stream)
+    return stream
+
+  def unsubscribe(self, name: str):
+    stream = self.streams.pop(name, None)
+    if stream and self.ready.is_set():
+      self.loop.call_soon_threadsafe(self.close_stream, stream)
+
+  def run_in_stream(self, name: str, function: Callable[[], None]):
+    stream = self.streams.get(name)
+    if stream and stream.queue and self.ready.is_set():
+      asyncio.run_coroutine_threadsafe(stream.queue.put(function), self.loop)
+
+  def run(self):
+    asyncio.set_event_loop(self.loop)
+    self.loop.run_until_complete(self.main())
+    self.loop.close()
+
+  async def main(self):
+    import aiohttp
+
+    self.stopped = asyncio.Event()
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+      self.session = session
+      self.ready.set()
+      for stream in list(self.streams.values()):
+        self.open_stream(stream)
+      await self.stopped.wait()
+      event_log.info("streams_closing", streams=len(self.streams))
+      streams = list(self.streams.values())
+      for stream in streams:
+        self.close_stream(stream)
+      tasks = [task for stream in streams for task in (stream.reader, stream.dispatcher) if task]
+      await asyncio.gather(*tasks, return_exceptions=True)
+
+  def open_stream(self, stream: Stream):
+    if stream.is_open:
+      return
+    stream.queue = asyncio.Queue(self.queue_size)
+    stream.dispatcher = self.loop.create_task(self.dispatch(stream))
+    stream.reader = self.loop.create_task(self.read(stream))
+
+  def close_stream(self, stream: Stream):
+    for task in (stream.reader, stream.dispatcher):
+      if task:
+        task.cancel()
+
+  def backoff(self, failures: int):
+    delay = min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+    return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+  async def read(self, stream: Stream):
+    failures = 0
+    while not self.stopped.is_set():
+      try:
+        async with self.session.get(stream.url(), headers=stream.headers()) as response:
+          event_log.info("stream_connected", stream=stream.name, status=response.status, connects=stream.connects + 1)
+          response.raise_for_status()
+          stream.connects += 1
+          if stream.connects > 1 and stream.on_reconnect:
+            self.loop.run_in_executor(None, stream.on_reconnect)
+          async for line in response.content:
+            line = line.strip()
+            if line:
+              failures = 0
+              if self.journal:
+                self.journal.write(stream.name, line)
+              # blocks this reader (and the socket) while the dispatcher is behind
+              await stream.queue.put(line)
+          event_log.warning("stream_closed", stream=stream.name)
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        event_log.error("stream_error", stream=stream.name, error=repr(e))
+      failures += 1
+      delay = self.backoff(failures)
+      event_log.info("stream_reconnecting", stream=stream.name, delay=round(delay, 2), failures=failures)
+      await asyncio.sleep(delay)
+
+  async def dispatch(self, stream: Stream):
+    while True:
+      line = await stream.queue.get()
+      if callable(line):
+        try:
+          line()
+        except Exception as e:
+          event_log.error("stream_task_error", stream=stream.name, error=repr(e))
+        continue
+      stream.messages_received += 1
+      try:
+        message = stream.decode(line)
+        if message is not None:
+          stream.callback(message)
+      except Exception as e:
+        event_log.error("stream_message_error", stream=stream.name, error=repr(e))
@@ -0,0 +1,91 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import Lock, Thread
+from typing import Callable
+
+from event_log import event_log
+
+
+class SymbolCache:
+  def __init__(self, fetch: Callable[[str], dict], path="symbol_cache.json", ttl=24 * 60 * 60, capacity=500):
+    self.fetch = fetch
+    self.path = path
+    self.ttl = ttl
+    self.capacity = capacity
+    self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+    self.refreshing: set[str] = set()
+    self.lock = Lock()
+    self.load()
+
+  def load(self):
+    if not os.path.exists(self.path):
+      return
+    try:
+      with open(self.path) as file:
+        for symbol, (fetched_at, symbol_info) in json.load(file).items():
+          self.entries[symbol] = (fetched_at, symbol_info)
+      event_log.info("symbol_cache_loaded", symbols=len(self.entries), path=self.path)
+    except Exception as e:
+      event_log.error("symbol_cache_load_error", path=self.path, error=repr(e))
+
+  def save(self):
+    with self.lock:
+      entries = dict(self.entries)
+    temp_path = f"{self.path}.tmp"
+    with open(temp_path, "w") as file:
+      json.dump(entries, file)
+    os.replace(temp_path, self.path)
+
+  def get(self, symbol: str):
+    symbol = symbol.upper()
+    with self.lock:
+      entry = self.entries.get(symbol)
+      if entry:
+        self.entries.move_to_end(symbol)
+    if entry is None:
+      return self.refresh(symbol)
+    fetched_at, symbol_info = entry
+    if time.time() - fetched_at > self.ttl:
+      self.refresh_in_background([symbol])
+    return symbol_info
+
+  def is_fresh(self, symbol: str):
+    entry = self.entries.get(symbol)
+    return entry is not None and time.time() - entry[0] <= self.ttl
+
+  def refresh(self, symbol: str, save=True):
+    symbol_info = self.fetch(symbol)
+    if symbol_info:
+      with self.lock:
+        self.entries[symbol] = (time.time(), symbol_info)
+        self.entries.move_to_end(symbol)
+        while len(self.entries) > self.capacity:
+          self.entries.popitem(last=False)
+      if save:
+        self.save()
+    return symbol_info
+
+  def refresh_in_background(self, symbols: list[str]):
+    with self.lock:
+      symbols = [symbol for symbol in symbols if symbol not in self.refreshing]
+      self.refreshing.update(symbols)
+    if symbols:
+      Thread(target=self.run_refresh, args=(symbols,), daemon=True).start()
+
+  def run_refresh(self, symbols: list[str]):
+    try:
+      for symbol in symbols:
+        try:
+          self.refresh(symbol, save=False)
+        except Exception as e:
+          event_log.error("symbol_refresh_error", symbol=symbol, error=repr(e))
+      self.save()
+    finally:
+      with self.lock:
+        self.refreshing.difference_update(symbols)
+
+  def prefetch(self, symbols: list[str]):
+    symbols = [symbol.strip().upper() for symbol in symbols if symbol.strip()]
+    self.refresh_in_background([symbol for symbol in symbols if not self.is_fresh(symbol)])
@@ -0,0 +1,90 @@
+import random
+from math import ceil
+
+status_descriptions = {
+  "ACK": "Received",
+  "FLP": "Partial Fill",
+  "FLL": "Filled",
+  "OUT": "UROut",
+  "REJ": "Rejected"
+}
+
+
+def order_json(order_id: str, symbol: str, order_type: str, status: str, buy_or_sell: str, open_or_close: str, quantity: int, exec_quantity=0, filled_price=0.0, stop_price: float = None, conditional_order_id: str = None, commission_fee=0.0, opened_date_time="2024-01-02T14:30:00Z"):
+  order = {
+    "AccountID": "SIM123456M", "OrderID": order_id, "OrderType": order_type, "Status": status, "StatusDescription": status_descriptions[status],
+    "FilledPrice": f"{filled_price:.2f}", "OpenedDateTime": opened_date_time, "CommissionFee": f"{commission_fee:.2f}",
+    "Duration": "DAY", "Routing": "Intelligent",
+    "Legs": [{
+      "Symbol": symbol, "AssetType": "STOCK", "BuyOrSell": buy_or_sell, "OpenOrClose": open_or_close,
+      "ExecQuantity": str(exec_quantity), "QuantityOrdered": str(quantity), "QuantityRemaining": str(quantity - exec_quantity), "ExecutionPrice": f"{filled_price:.2f}"
+    }]
+  }
+  if stop_price is not None:
+    order["StopPrice"] = f"{stop_price:.2f}"
+  if conditional_order_id:
+    order["ConditionalOrders"] = [{ "OrderID": conditional_order_id, "Relationship": "OSO" }]
+  return order
+
+
+def synthetic_trade(rng: random.Random, trade_id: int, symbol: str):
+  price = round(rng.uniform(20, 500), 2)
+  is_long = rng.random() < 0.6
+  entry_side, exit_side = ("Buy", "Sell") if is_long else ("SellShort", "BuyToCover")
+  stop_price = round(price * (0.99 if is_long else 1.01), 2)
+  quantity = rng.randint(1, 20) * 10
+  entry_id, stop_id = f"{trade_id}00", f"{trade_id}01"
+  entry = lambda status, exec_quantity=0, filled_price=0.0, fee=0.0: order_json(entry_id, symbol, "Market", status, entry_side, "Open", quantity, exec_quantity, filled_price, conditional_order_id=stop_id, commission_fee=fee)
+  stop = lambda status, stop_quantity, exec_quantity=0, filled_price=0.0, fee=0.0: order_json(stop_id, symbol, "StopMarket", status, exit_side, "Close", stop_quantity, exec_quantity, filled_price, stop_price, entry_id, fee)
+
+  if rng.random() < 0.03:
+    yield entry("REJ")
+    return
+  yield stop("ACK", quantity)
+  yield entry("ACK")
+  if rng.random() < 0.03:
+    yield entry("OUT")
+    yield stop("OUT", quantity)
+    return
+  if rng.random() < 0.3:
+    yield entry("FLP", quantity // 2, price)
+  yield entry("FLL", quantity, price, quantity * 0.005)
+
+  remaining = quantity
+  exit_count = 0
+  while remaining > 0:
+    exit_price = round(price * rng.uniform(0.99, 1.03) if is_long else price * rng.uniform(0.97, 1.01), 2)
+    if rng.random() < 0.25:
+      yield stop("FLL", remaining, remaining, stop_price, remaining * 0.005)
+      return
+    exit_quantity = remaining if rng.random() < 0.4 else ceil(remaining / 2)
+    remaining -= exit_quantity
+    yield stop("ACK", remaining) if remaining > 0 else stop("OUT", exit_quantity)
+    exit_count += 1
+    exit_id = f"{trade_id}{exit_count + 1:02d}"
+    yield order_json(exit_id, symbol, "Market", "ACK", exit_side, "Close", exit_quantity)
+    yield order_json(exit_id, symbol, "Market", "FLL", exit_side, "Close", exit_quantity, exit_quantity, exit_price, commission_fee=exit_quantity * 0.005)
+
+
+def synthetic_order_flow(count: int, symbol_count=50, concurrency=10, seed=0):
+  rng = random.Random(seed)
+  symbols = [f"SYM{index:03d}" for index in range(symbol_count)]
+  busy_symbols: set[str] = set()
+  active = []
+  trade_id = 0
+  produced = 0
+  while produced < count:
+    while len(active) < concurrency and len(busy_symbols) < len(symbols):
+      symbol = rng.choice([symbol for symbol in symbols if symbol not in busy_symbols])
+      trade_id += 1
+      busy_symbols.add(symbol)
+      active.append((symbol, synthetic_trade(rng, trade_id, symbol)))
+    index = rng.randrange(len(active))
+    symbol, trade = active[index]
+    order = next(trade, None)
+    if order is None:
+      active.pop(index)
+      busy_symbols.discard(symbol)
+      continue
+    produced += 1
+    yield order
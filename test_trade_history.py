@@ -0,0 +1,140 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from interface import Quote
+from stream_journal import read_journal, replay
+from synthetic_orders import order_json, synthetic_order_flow
+from trade_history import Order, Trade, TradeHistory
+
+session_path = os.path.join(os.path.dirname(__file__), "fixtures", "session.streams.gz")
+
+
+def recompute(trade: Trade):
+  orders = list(trade.orders.values())
+  filled = [order for order in orders if order.is_filled]
+  entry_amount = sum(order.filled_price * order.execution_quantity for order in filled if order.is_open)
+  entry_quantity = sum(order.execution_quantity for order in filled if order.is_open)
+  exit_amount = sum(order.filled_price * order.execution_quantity for order in filled if not order.is_open)
+  exit_quantity = sum(order.execution_quantity for order in filled if not order.is_open)
+  initial_stop_order = [order for order in orders if order.is_stop_order][0]
+  side_factor = 1 if initial_stop_order.buy_or_sell == "Sell" else -1
+  commission = round(sum(order.commission_fee for order in filled), 2)
+  commission_fee = commission if initial_stop_order.buy_or_sell == "Sell" else -commission
+  return {
+    "opened_shares": entry_quantity - exit_quantity,
+    "commission_fee": commission_fee,
+    "risk_amount": round(entry_amount - initial_stop_order.stop_price * entry_quantity, 2) * side_factor or 100,
+    "realized_amount": round(exit_amount - entry_amount - commission_fee, 2) * side_factor
+  }
+
+
+def aggregates(trade: Trade):
+  return {
+    "opened_shares": trade.opened_shares,
+    "commission_fee": trade.commission_fee,
+    "risk_amount": trade.risk_amount,
+    "realized_amount": trade.realized_amount
+  }
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_running_aggregates_match_full_recompute(seed):
+  trade_history = TradeHistory()
+  for order_json in synthetic_order_flow(5000, symbol_count=20, seed=seed):
+    order = Order(order_json)
+    trade_history.append(order)
+    trade = trade_history.trade_by_order_id.get(order.order_id)
+    if trade is not None and trade.initial_stop_order is not None:
+      assert aggregates(trade) == pytest.approx(recompute(trade), abs=1e-6)
+
+  trades = [trade for trades in trade_history.trade_history.values() for trade in trades]
+  assert any(trade.is_completed for trade in trades)
+  for trade in trades:
+    assert aggregates(trade) == pytest.approx(recompute(trade), abs=1e-6)
+
+
+def test_trade_without_stop_order():
+  trade_history = TradeHistory()
+  trade_history.append(Order(order_json("100", "SPY", "Market", "FLL", "SellShort", "Open", 100, 100, 450.0, commission_fee=0.5)))
+  trade_history.append(Order(order_json("101", "SPY", "Market", "FLL", "BuyToCover", "Close", 100, 100, 449.0, commission_fee=0.5)))
+  trade = trade_history.trade_history["SPY"][-1]
+  assert trade.initial_stop_order is None
+  assert trade.side_factor == -1
+  assert trade.commission_fee == -1.0
+  assert trade.risk_amount == 100
+  assert trade.realized_amount == 99.0
+  assert trade.reward_position(Quote({ "Symbol": "SPY", "Bid": "448.99", "Ask": "449.01" })) is None
+  assert "0.99R" in repr(trade_history)
+
+
+def list_scan_trades(path: str):
+  # groups the raw order lines of a journal into trades per symbol and keeps the
+  # latest update of each OrderID, independent of TradeHistory/OrderStore
+  trades: dict[str, list[dict]] = {}
+  for _, stream, line in read_journal(path):
+    if not stream.startswith("orders"):
+      continue
+    order_json = json.loads(line)
+    if "OrderID" not in order_json or order_json["StatusDescription"] == "Rejected":
+      continue
+    symbol = order_json["Legs"][0]["Symbol"]
+    groups = trades.setdefault(symbol, [])
+    group = groups[-1] if groups else None
+    linked = lambda group: order_json["OrderID"] in group or any(conditional["OrderID"] in group for conditional in order_json.get("ConditionalOrders", []))
+    if group is not None and (open_shares(list(group.values())) > 0 or linked(group)):
+      group[order_json["OrderID"]] = Order(order_json)
+    elif order_json["Legs"][0]["OpenOrClose"] == "Open" or order_json["OrderType"] == "StopMarket":
+      groups.append({ order_json["OrderID"]: Order(order_json) })
+  return { symbol: [list(group.values()) for group in groups] for symbol, groups in trades.items() }
+
+
+def open_shares(orders: list[Order]):
+  return sum(order.execution_quantity * (1 if order.is_open else -1) for order in orders if order.is_filled)
+
+
+def list_scan_aggregates(orders: list[Order]):
+  entry_amount = sum([order.filled_price * order.execution_quantity for order in orders if order.is_open and order.is_filled])
+  entry_quantity = sum([order.execution_quantity for order in orders if order.is_open and order.is_filled])
+  exit_amount = sum([order.filled_price * order.execution_quantity for order in orders if not order.is_open and order.is_filled])
+  stops = [order for order in orders if order.is_stop_order]
+  entry = [order for order in orders if order.is_open][0]
+  side_factor = (1 if stops[0].buy_or_sell == "Sell" else -1) if stops else (1 if entry.buy_or_sell == "Buy" else -1)
+  commission = round(sum([order.commission_fee for order in orders if order.is_filled]), 2)
+  commission_fee = commission if side_factor == 1 else -commission
+  risk_amount = round(entry_amount - stops[0].stop_price * entry_quantity, 2) * side_factor or 100 if stops else 100
+  return {
+    "opened_shares": open_shares(orders),
+    "commission_fee": commission_fee,
+    "risk_amount": risk_amount,
+    "realized_amount": round(exit_amount - entry_amount - commission_fee, 2) * side_factor
+  }
+
+
+def duplicate_order_lines(path: str, target: str):
+  with gzip.open(target, "wb") as file:
+    for received_at, stream, line in read_journal(path):
+      for _ in range(2 if stream.startswith("orders") else 1):
+        file.write(b"%d\t%s\t%s\n" % (received_at, stream.encode(), line))
+
+
+@pytest.mark.parametrize("duplicated", [False, True])
+def test_replayed_session_matches_list_scan(tmp_path, duplicated):
+  path = session_path
+  if duplicated:
+    path = str(tmp_path / "duplicated.streams.gz")
+    duplicate_order_lines(session_path, path)
+  trade_history = replay(path)["trade_history"]
+  expected = list_scan_trades(session_path)
+
+  assert sorted(trade_history.trade_history) == sorted(expected)
+  for symbol, trades in trade_history.trade_history.items():
+    assert [sorted(trade.orders) for trade in trades] == [sorted(order.order_id for order in orders) for orders in expected[symbol]]
+    for trade, orders in zip(trades, expected[symbol]):
+      assert aggregates(trade) == pytest.approx(list_scan_aggregates(orders), abs=1e-6)
+
+  closed = [trade for trades in trade_history.trade_history.values() for trade in trades if trade.opened_shares <= 0]
+  assert len(closed) == 5
+  assert round(sum(trade.realized_amount for trade in closed), 2) == -18.0
@@ -0,0 +1,36 @@
+import os
+from datetime import date
+
+from daily_report import summarize
+from stream_journal import replay
+from synthetic_orders import order_json
+from trade_history import Order, TradeHistory
+from trade_journal import TradeJournal
+
+session_path = os.path.join(os.path.dirname(__file__), "fixtures", "session.streams.gz")
+
+
+def test_journals_trade_without_stop_order(tmp_path):
+  trade_history = TradeHistory()
+  trade_history.append(Order(order_json("100", "SPY", "Market", "FLL", "SellShort", "Open", 100, 100, 450.0, commission_fee=0.5)))
+  trade_history.append(Order(order_json("101", "SPY", "Market", "FLL", "BuyToCover", "Close", 100, 100, 449.0, commission_fee=0.5)))
+  journal = TradeJournal(str(tmp_path))
+  journal.write_day(trade_history, date(2024, 1, 2))
+
+  trades = journal.load_trades()
+  assert len(trades) == 1
+  assert trades[0]["symbol"] == "SPY"
+  assert trades[0]["side_factor"] == -1
+  assert trades[0]["risk_amount"] == 100
+  assert trades[0]["realized_amount"] == 99.0
+
+
+def test_journal_matches_replayed_session(tmp_path):
+  trade_history = replay(session_path)["trade_history"]
+  journal = TradeJournal(str(tmp_path))
+  journal.write_day(trade_history, date(2024, 1, 2))
+
+  closed = [trade for trades in trade_history.trade_history.values() for trade in trades if trade.is_completed]
+  summary = summarize(journal.load_trades())
+  assert summary["trades"] == len(closed) == 5
+  assert summary["realized_pnl"] == round(sum(trade.realized_amount for trade in closed), 2)
@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+
+from interface import Quote
+
+tick_dtype = np.dtype([
+  ("timestamp", "f8"),
+  ("bid", "f8"),
+  ("ask", "f8"),
+  ("last", "f8"),
+  ("size", "f8")
+])
+
+
+class TickBuffer:
+  # every tick is written twice, at index and index + capacity, so the latest
+  # window is always one contiguous slice and readers get views, never copies
+  def __init__(self, capacity=4096):
+    self.capacity = capacity
+    self.ticks = np.zeros(2 * capacity, dtype=tick_dtype)
+    self.count = 0
+
+  def __len__(self):
+    return min(self.count, self.capacity)
+
+  def append(self, timestamp: float, bid: float, ask: float, last: float, size: float):
+    index = self.count % self.capacity
+    tick = (timestamp, bid, ask, last, size)
+    self.ticks[index] = tick
+    self.ticks[index + self.capacity] = tick
+    self.count += 1
+
+  def view(self, size: int = None):
+    count = self.count
+    length = min(count, self.capacity) if size is None else min(size, count, self.capacity)
+    end = (count - 1) % self.capacity + self.capacity + 1 if count else 0
+    return self.ticks[end - length:end]
+
+  def since(self, seconds: float, now: float = None):
+    ticks = self.view()
+    start = np.searchsorted(ticks["timestamp"], (now or time.time()) - seconds)
+    return ticks[start:]
+
+  def spread(self, size: int = None):
+    ticks = self.view(size)
+    return float((ticks["ask"] - ticks["bid"]).mean()) if len(ticks) else None
+
+  def volatility(self, size: int = None):
+    mid = self.mid(self.view(size))
+    mid = mid[mid > 0]
+    if len(mid) < 3:
+      return None
+    return float(np.diff(np.log(mid)).std())
+
+  def quote_at(self, timestamp: float):
+    ticks = self.view()
+    index = np.searchsorted(ticks["timestamp"], timestamp, side="right") - 1
+    return ticks[index] if index >= 0 else None
+
+  def slippage(self, timestamp: float, price: float, side_factor: int):
+    tick = self.quote_at(timestamp)
+    if tick is None:
+      return None
+    reference = tick["ask"] if side_factor == 1 else tick["bid"]
+    return float((price - reference) * side_factor)
+
+  @staticmethod
+  def mid(ticks: np.ndarray):
+    return (ticks["bid"] + ticks["ask"]) / 2
+
+
+class TickBuffers:
+  def __init__(self, capacity=4096):
+    self.capacity = capacity
+    self.buffers: dict[str, TickBuffer] = {}
+    self.live_symbols: set[str] = None
+
+  def __getitem__(self, symbol: str):
+    return self.buffers[symbol]
+
+  def __contains__(self, symbol: str):
+    return symbol in self.buffers
+
+  def get(self, symbol: str):
+    return self.buffers.get(symbol)
+
+  def append(self, quote: Quote, timestamp: float = None):
+    buffer = self.buffers.get(quote.symbol)
+    if buffer is None:
+      # the previous quote stream keeps delivering until its replacement starts
+      if self.live_symbols is not None and quote.symbol not in self.live_symbols:
+        return
+      buffer = self.buffers[quote.symbol] = TickBuffer(self.capacity)
+    buffer.append(timestamp or time.time(), quote.bid or np.nan, quote.ask or np.nan, quote.last or np.nan, quote.last_size)
+
+  def discard(self, symbol: str):
+    self.buffers.pop(symbol, None)
+
+  def retain(self, symbols: set[str]):
+    self.live_symbols = set(symbols)
+    for symbol in list(self.buffers.keys() - self.live_symbols):
+      self.discard(symbol)
+
+  def memory_bytes(self):
+    return sum(buffer.ticks.nbytes for buffer in self.buffers.values())
@@ -0,0 +1,146 @@
+import os
+import random
+import time
+from threading import Event, Thread
+
+from event_log import event_log
+from http_client import ApiClient
+
+keyring_service = "quick-trades"
+
+
+def load_keyring():
+  try:
+    import keyring
+    return keyring
+  except ImportError:
+    return None
+
+
+class Tokens:
+  def __init__(self, access_token: str, refresh_token: str, expires_in: float):
+    self.access_token = access_token
+    self.refresh_token = refresh_token
+    self.expires_at = time.time() + expires_in
+
+
+class TokenManager:
+  def __init__(self, api: ApiClient, token_url: str, client_id: str, client_secret: str, redirect_url: str, signin_url: str, path="refresh_token", use_keyring=True, refresh_at=0.8, jitter=0.1, retry_delay=5, max_retry_delay=60):
+    self.api = api
+    self.token_url = token_url
+    self.client_id = client_id
+    self.client_secret = client_secret
+    self.redirect_url = redirect_url
+    self.signin_url = signin_url
+    self.path = path
+    self.use_keyring = use_keyring
+    self.refresh_at = refresh_at
+    self.jitter = jitter
+    self.retry_delay = retry_delay
+    self.max_retry_delay = max_retry_delay
+    self.tokens: Tokens = None
+    self.stopped = Event()
+
+  @property
+  def access_token(self):
+    return self.tokens.access_token
+
+  @property
+  def refresh_token(self):
+    return self.tokens.refresh_token
+
+  def start(self):
+    tokens = None
+    refresh_token = self.load_refresh_token()
+    if refresh_token:
+      event_log.info("token_refresh_stored")
+      tokens = self.refresh(refresh_token)
+    if tokens is None:
+      tokens = self.sign_in()
+    self.publish(tokens)
+    Thread(target=self.run_refresh, daemon=True).start()
+
+  def stop(self):
+    self.stopped.set()
+
+  def sign_in(self):
+    from web_signin import signin
+    auth_code = signin(self.signin_url)
+    tokens = self.exchange({
+      "grant_type": "authorization_code",
+      "code": auth_code,
+      "redirect_uri": self.redirect_url
+    })
+    if tokens is None:
+      raise RuntimeError("could not exchange the authorization code for tokens")
+    return tokens
+
+  def refresh(self, refresh_token: str):
+    return self.exchange({ "grant_type": "refresh_token", "refresh_token": refresh_token }, refresh_token)
+
+  def exchange(self, data: dict, refresh_token: str = None):
+    try:
+      response = self.api.post(self.token_url, auth=False, data={
+        "client_id": self.client_id,
+        "client_secret": self.client_secret,
+        **data
+      }, headers={ "content-type": "application/x-www-form-urlencoded" })
+    except Exception as e:
+      event_log.error("token_request_error", error=repr(e))
+      return None
+    if response.status_code != 200:
+      event_log.error("token_request_failed", status=response.status_code, body=response.text)
+      return None
+    response_json = response.json()
+    return Tokens(response_json["access_token"], response_json.get("refresh_token", refresh_token), float(response_json.get("expires_in", 1200)))
+
+  def publish(self, tokens: Tokens):
+    self.tokens = tokens
+    if tokens.refresh_token:
+      self.save_refresh_token(tokens.refresh_token)
+
+  def next_refresh_delay(self):
+    lifetime = max(self.tokens.expires_at - time.time(), 0)
+    return lifetime * self.refresh_at * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+  def run_refresh(self):
+    event_log.info("token_refresh_schedule", refresh_in=round(self.next_refresh_delay()))
+    while not self.stopped.wait(self.next_refresh_delay()):
+      retry_delay = self.retry_delay
+      while not self.stopped.is_set():
+        event_log.info("token_refreshing")
+        tokens = self.refresh(self.tokens.refresh_token)
+        if tokens:
+          event_log.info("token_refreshed", expires_in=round(tokens.expires_at - time.time()))
+          self.publish(tokens)
+          break
+        event_log.warning("token_refresh_retry", retry_in=retry_delay)
+        if self.stopped.wait(retry_delay):
+          return
+        retry_delay = min(retry_delay * 2, self.max_retry_delay)
+
+  def load_refresh_token(self):
+    keyring = load_keyring() if self.use_keyring else None
+    if keyring:
+      try:
+        return keyring.get_password(keyring_service, self.client_id)
+      except Exception as e:
+        event_log.error("keyring_read_error", error=repr(e))
+    if os.path.exists(self.path):
+      with open(self.path) as file:
+        return file.read().strip() or None
+    return None
+
+  def save_refresh_token(self, refresh_token: str):
+    keyring = load_keyring() if self.use_keyring else None
+    if keyring:
+      try:
+        keyring.set_password(keyring_service, self.client_id, refresh_token)
+        return
+      except Exception as e:
+        event_log.error("keyring_save_error", error=repr(e))
+    temp_path = f"{self.path}.tmp"
+    file_descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(file_descriptor, "w") as file:
+      file.write(refresh_token)
+    os.replace(temp_path, self.path)
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Callable, Literal
 from statistics import mean
 from collections import OrderedDict, defaultdict
 
@@ -15,6 +15,7 @@ class Order:
     self.filled_price = float(order_json["FilledPrice"]) or None
     self.stop_price = float(order_json["StopPrice"]) if "StopPrice" in order_json else None
     self.opened_date_time = order_json["OpenedDateTime"]
+    self.closed_date_time = order_json.get("ClosedDateTime")
     self.commission_fee = float(order_json["CommissionFee"])
 
     leg = order_json["Legs"][0]
@@ -24,6 +25,7 @@ class Order:
     self.open_or_close: OpenOrClose = leg.get("OpenOrClose")
     self.execution_quantity = int(leg["ExecQuantity"])
     self.ordered_quantity = int(leg["QuantityOrdered"])
+    self.conditional_order_ids = [conditional_order["OrderID"] for conditional_order in order_json.get("ConditionalOrders", [])]
 
   @property
   def is_open(self):
@@ -41,20 +43,18 @@ class Order:
   def is_stop_order(self):
     return self.order_type == "StopMarket"
   
+  @property
+  def is_terminal(self):
+    return self.status_description in terminal_status_descriptions
+  
   @property
   def conditional_order_id(self):
-    conditional_orders = self.order_json.get("ConditionalOrders")
-    if conditional_orders:
-      return conditional_orders[0]["OrderID"]
-    else:
-      return None
+    return self.conditional_order_ids[0] if self.conditional_order_ids else None
+
+  @property
+  def state(self):
+    return (self.status, self.execution_quantity, self.ordered_quantity, self.filled_price, self.stop_price)
 
-  def __eq__(self, order: object) -> bool:
-    return isinstance(order, Order) and self.__repr__() == order.__repr__()
-  
-  def __hash__(self) -> int:
-    return hash(self.__repr__())
-  
   def __repr__(self) -> str:
     fill_str = f" @ ${self.filled_price}" if self.filled_price else ""
     stop_str = f" with StopPrice @ ${self.stop_price}" if self.stop_price else ""
@@ -63,66 +63,98 @@ class Order:
 
 class Trade:
   def __init__(self, order: Order):
-    self.orders = { order }
+    self.orders: dict[str, Order] = {}
+    self.linked_order_ids: set[str] = set()
     self.symbol = order.symbol
+    self.entry_amount = 0
+    self.entry_quantity = 0
+    self.exit_amount = 0
+    self.exit_quantity = 0
+    self.filled_commission_fee = 0
+    self.entry_order_id = None
+    self.initial_stop_order_id = None
+    self.latest_stop_order_id = None
+    self.closed_date_time = None
+    self.add_order(order)
 
   def append(self, order: Order):
     if self.is_opened(order) and order.symbol == self.symbol:
-      self.orders.add(order)
+      self.add_order(order)
       return True
     return False
 
+  def add_order(self, order: Order):
+    previous = self.orders.get(order.order_id)
+    if previous is not None:
+      self.apply_fill(previous, -1)
+    elif order.is_stop_order:
+      if self.initial_stop_order_id is None:
+        self.initial_stop_order_id = order.order_id
+      self.latest_stop_order_id = order.order_id
+    self.orders[order.order_id] = order
+    self.linked_order_ids.update(order.conditional_order_ids)
+    self.apply_fill(order, 1)
+
+  def apply_fill(self, order: Order, sign: int):
+    if order.is_filled:
+      self.filled_commission_fee += sign * order.commission_fee
+      if order.is_open:
+        self.entry_amount += sign * order.filled_price * order.execution_quantity
+        self.entry_quantity += sign * order.execution_quantity
+        if self.entry_order_id is None:
+          self.entry_order_id = order.order_id
+      else:
+        self.exit_amount += sign * order.filled_price * order.execution_quantity
+        self.exit_quantity += sign * order.execution_quantity
+        if sign > 0:
+          self.closed_date_time = order.closed_date_time or order.opened_date_time
+
   @property
-  def entry_amount(self):
-    return sum([order.filled_price * order.execution_quantity for order in self.orders if order.is_open and order.is_filled])
-  
+  def entry_order(self):
+    return self.orders.get(self.entry_order_id)
+
   @property
-  def entry_quantity(self):
-    return sum([order.execution_quantity for order in self.orders if order.is_open and order.is_filled])
+  def opened_date_time(self):
+    return self.entry_order.opened_date_time if self.entry_order else None
 
   @property
-  def exit_amount(self):
-    return sum([order.filled_price * order.execution_quantity for order in self.orders if not order.is_open and order.is_filled])
+  def is_completed(self):
+    return self.entry_quantity > 0 and self.opened_shares <= 0
 
   @property
-  def exit_quantity(self):
-    return sum([order.execution_quantity for order in self.orders if not order.is_open and order.is_filled])
+  def initial_stop_order(self):
+    return self.orders.get(self.initial_stop_order_id)
+
+  @property
+  def latest_stop_order(self):
+    return self.orders.get(self.latest_stop_order_id)
 
   @property
   def commission_fee(self):
-    commission = round(sum([order.commission_fee for order in self.orders if order.is_filled]), 2)
-    return commission if self.initial_stop_order.buy_or_sell == 'Sell' else -commission
+    commission = round(self.filled_commission_fee, 2)
+    return commission if self.side_factor == 1 else -commission
 
   @property
   def opened_shares(self):
-    shares_open = 0
-    for order in self.orders:
-      if order.is_filled:
-        if order.is_open:
-          shares_open += order.execution_quantity
-        else:
-          shares_open -= order.execution_quantity
-    return shares_open
+    return self.entry_quantity - self.exit_quantity
 
   def is_opened(self, order: Order = None):
     if order == None:
       return self.opened_shares > 0
-    return self.opened_shares > 0 or order.order_id == self.latest_stop_order.conditional_order_id
+    return self.opened_shares > 0 or order.order_id in self.orders or order.order_id in self.linked_order_ids
   
   @property
   def side_factor(self):
+    if self.initial_stop_order is None:
+      entry_order = self.entry_order or next(iter(self.orders.values()))
+      return 1 if entry_order.buy_or_sell == "Buy" else -1
     return 1 if self.initial_stop_order.buy_or_sell == "Sell" else -1
 
   @property
   def risk_amount(self):
+    if self.initial_stop_order is None:
+      return 100
     return round(self.entry_amount - self.initial_stop_order.stop_price * self.entry_quantity, 2) * self.side_factor or 100
-  @property
-  def initial_stop_order(self):
-    return [order for order in self.orders if order.is_stop_order][0]
-  
-  @property
-  def latest_stop_order(self):
-    return [order for order in self.orders if order.is_stop_order][-1]
 
   @property
   def realized_amount(self):
@@ -133,8 +165,7 @@ class Trade:
     return round(self.realized_amount / self.risk_amount, 2)
 
   def resolve_quote(self, quote: Quote):
-    entry_order = [order for order in self.orders if order.is_open and order.is_filled][0]
-    return quote.bid if entry_order.buy_or_sell == "Buy" else quote.ask
+    return quote.bid if self.entry_order.buy_or_sell == "Buy" else quote.ask
 
   def unrealized_reward(self, quote: Quote):
     quote_price = self.resolve_quote(quote)
@@ -142,42 +173,113 @@ class Trade:
     return profit_loss_amount / self.risk_amount
 
   def reward_position(self, quote: Quote):
+    if self.initial_stop_order is None:
+      return None
     quote_price = self.resolve_quote(quote)
     avg_entry_price = self.entry_amount / self.entry_quantity
     return (quote_price - avg_entry_price) / (avg_entry_price - self.initial_stop_order.stop_price)
 
   def __repr__(self) -> str:
     trade_str = f"{self.symbol}:\n"
-    for order in self.orders:
+    for order in self.orders.values():
       trade_str += f"  {order}\n"
     trade_str += f"  {self.realized_reward}R, Risk: {self.risk_amount}, Reward: {self.realized_amount} ($)\n"
     return trade_str
 
 
+class OrderStore:
+  def __init__(self, keep_events=False):
+    self.orders: dict[str, Order] = {}
+    self.events: list[tuple] = [] if keep_events else None
+
+  def apply(self, order: Order):
+    previous = self.orders.get(order.order_id)
+    if previous is not None and previous.is_terminal and not order.is_terminal:
+      return False
+    self.orders[order.order_id] = order
+    if self.events is not None:
+      self.events.append((order.order_id, order.status, order.execution_quantity, order.filled_price))
+    return True
+
+  def get(self, order_id: str):
+    return self.orders.get(order_id)
+
+  def __contains__(self, order_id: str):
+    return order_id in self.orders
+
+  def __iter__(self):
+    return iter(self.orders.values())
+
+  def __len__(self):
+    return len(self.orders)
+
+
 class TradeHistory:
-  def __init__(self):
+  def __init__(self, keep_order_events=False):
     self.trade_history: dict[str, list[Trade]] = defaultdict(lambda: [])
-    self.order_history = []
+    self.order_history = OrderStore(keep_order_events)
+    self.trade_by_order_id: dict[str, Trade] = {}
+    self.positions: dict[str, Trade] = {}
+    self.position_listeners: list[PositionListener] = []
 
   def append(self, order: Order):
-    self.order_history.append(order)
-    if order.is_rejected:
+    if not self.order_history.apply(order) or order.is_rejected:
       return
-    trades_by_symbol = self.trade_history[order.symbol]
-    if len(trades_by_symbol) != 0 and trades_by_symbol[-1].is_opened(order):
-      trades_by_symbol[-1].append(order)
-    elif order.is_open or order.is_stop_order:
-      trades_by_symbol.append(Trade(order))
+    trade = self.trade_by_order_id.get(order.order_id)
+    if trade is not None:
+      opened_shares = trade.opened_shares
+      trade.add_order(order)
+    else:
+      trades_by_symbol = self.trade_history[order.symbol]
+      if len(trades_by_symbol) != 0 and trades_by_symbol[-1].is_opened(order):
+        trade = trades_by_symbol[-1]
+        opened_shares = trade.opened_shares
+        trade.append(order)
+      elif order.is_open or order.is_stop_order:
+        trade = Trade(order)
+        opened_shares = 0
+        trades_by_symbol.append(trade)
+      else:
+        return
+    self.trade_by_order_id[order.order_id] = trade
+    for order_id in order.conditional_order_ids:
+      self.trade_by_order_id.setdefault(order_id, trade)
+    self.update_position(trade, opened_shares)
+
+  def apply_snapshot(self, orders: list[Order]):
+    applied = []
+    for order in sorted(orders, key=lambda order: (order.opened_date_time, not order.is_open)):
+      previous = self.order_history.get(order.order_id)
+      if previous is None or previous.state != order.state:
+        self.append(order)
+        applied.append(order)
+    return applied
+
+  def update_position(self, trade: Trade, previous_opened_shares: int):
+    opened_shares = trade.opened_shares
+    if opened_shares == previous_opened_shares:
+      return
+    if opened_shares > 0 and previous_opened_shares <= 0:
+      self.positions[trade.symbol] = trade
+      change = "opened"
+    elif opened_shares <= 0:
+      if self.positions.get(trade.symbol) is not trade:
+        return
+      self.positions.pop(trade.symbol, None)
+      change = "closed"
+    else:
+      change = "resized"
+    for listener in self.position_listeners:
+      listener(change, trade.symbol, trade)
+
+  def subscribe(self, listener: "PositionListener"):
+    self.position_listeners.append(listener)
 
   def get_stop_order(self, symbol: str):
     return self.trade_history[symbol][-1].latest_stop_order
   
   def get_positions(self) -> dict[str, Trade]:
-    positions = {}
-    for symbol, trades in self.trade_history.items():
-      if len(trades) > 0 and trades[-1].is_opened():
-        positions[symbol] = trades[-1]
-    return positions
+    return self.positions
 
   
   def __repr__(self) -> str:
@@ -195,7 +297,12 @@ class TradeHistory:
     order_str = ""
     for order in self.order_history:
       order_str += f"{order}\n"
+    return order_str
 
 
 BuyOrSell = Literal["Buy", "Sell", "SellShort", "BuyToCover"]
-OpenOrClose = Literal["Open", "Close"]
\ No newline at end of file
+OpenOrClose = Literal["Open", "Close"]
+PositionChange = Literal["opened", "closed", "resized"]
+PositionListener = Callable[[PositionChange, str, Trade], None]
+
+terminal_status_descriptions = { "Filled", "Cancelled", "Rejected", "Expired" }
\ No newline at end of file
@@ -0,0 +1,106 @@
+import os
+from datetime import date
+
+import numpy as np
+
+from event_log import event_log
+from trade_history import Order, Trade, TradeHistory
+
+trade_dtype = np.dtype([
+  ("symbol", "U16"),
+  ("opened", "datetime64[s]"),
+  ("closed", "datetime64[s]"),
+  ("side_factor", "i1"),
+  ("entry_amount", "f8"),
+  ("entry_quantity", "i8"),
+  ("exit_amount", "f8"),
+  ("exit_quantity", "i8"),
+  ("commission_fee", "f8"),
+  ("risk_amount", "f8"),
+  ("realized_amount", "f8"),
+  ("realized_reward", "f8")
+])
+
+order_dtype = np.dtype([
+  ("order_id", "U24"),
+  ("symbol", "U16"),
+  ("order_type", "U16"),
+  ("status", "U8"),
+  ("buy_or_sell", "U12"),
+  ("open_or_close", "U8"),
+  ("opened", "datetime64[s]"),
+  ("closed", "datetime64[s]"),
+  ("filled_price", "f8"),
+  ("stop_price", "f8"),
+  ("execution_quantity", "i8"),
+  ("ordered_quantity", "i8"),
+  ("commission_fee", "f8")
+])
+
+
+def to_datetime64(date_time: str):
+  return np.datetime64(date_time.rstrip("Z"), "s") if date_time else np.datetime64("NaT", "s")
+
+
+def trade_record(trade: Trade):
+  return (
+    trade.symbol, to_datetime64(trade.opened_date_time), to_datetime64(trade.closed_date_time), trade.side_factor,
+    trade.entry_amount, trade.entry_quantity, trade.exit_amount, trade.exit_quantity,
+    trade.commission_fee, trade.risk_amount, trade.realized_amount, trade.realized_reward
+  )
+
+
+def order_record(order: Order):
+  return (
+    order.order_id, order.symbol, order.order_type, order.status, order.buy_or_sell, order.open_or_close or "",
+    to_datetime64(order.opened_date_time), to_datetime64(order.closed_date_time), order.filled_price or 0.0,
+    order.stop_price or 0.0, order.execution_quantity, order.ordered_quantity, order.commission_fee
+  )
+
+
+class TradeJournal:
+  def __init__(self, directory="trade_journal"):
+    self.trades_directory = os.path.join(directory, "trades")
+    self.orders_directory = os.path.join(directory, "orders")
+
+  def write_day(self, trade_history: TradeHistory, day: date = None):
+    day = day or date.today()
+    trades = [trade_record(trade) for trades in trade_history.trade_history.values() for trade in trades if trade.is_completed]
+    orders = [order_record(order) for order in trade_history.order_history]
+    self.save(self.trades_directory, day, np.array(trades, dtype=trade_dtype))
+    self.save(self.orders_directory, day, np.array(orders, dtype=order_dtype))
+    event_log.info("trade_journal_written", day=day.isoformat(), trades=len(trades), orders=len(orders))
+
+  @staticmethod
+  def save(directory: str, day: date, records: np.ndarray):
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f"{day.isoformat()}.tmp.npy")
+    np.save(temp_path, records)
+    os.replace(temp_path, os.path.join(directory, f"{day.isoformat()}.npy"))
+
+  @staticmethod
+  def days(directory: str, start: date = None, end: date = None):
+    if not os.path.isdir(directory):
+      return []
+    days = []
+    for file_name in os.listdir(directory):
+      if not file_name.endswith(".npy") or file_name.endswith(".tmp.npy"):
+        continue
+      day = date.fromisoformat(file_name[:-4])
+      if (start is None or day >= start) and (end is None or day <= end):
+        days.append(day)
+    return sorted(days)
+
+  def trades_path(self, day: date):
+    return os.path.join(self.trades_directory, f"{day.isoformat()}.npy")
+
+  def load(self, directory: str, dtype: np.dtype, start: date = None, end: date = None):
+    arrays = [np.load(os.path.join(directory, f"{day.isoformat()}.npy"), mmap_mode="r") for day in self.days(directory, start, end)]
+    arrays = [array for array in arrays if len(array)]
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+  def load_trades(self, start: date = None, end: date = None):
+    return self.load(self.trades_directory, trade_dtype, start, end)
+
+  def load_orders(self, start: date = None, end: date = None):
+    return self.load(self.orders_directory, order_dtype, start, end)
@@ -24,7 +24,7 @@ class TradingApp(TradingBackend):
   def __init__(self):
     super().__init__()
     self.geometry("300x600")
-    self.title("Quick Trades")
+    self.render_status()
     self.minsize(300, 400)
     self.attributes("-topmost", True)
     self.columnconfigure((0, 1, 2, 3), weight=1)
@@ -82,7 +82,7 @@ class TradingApp(TradingBackend):
     
     self.position_box = customtkinter.CTkTextbox(master=self, width=300, corner_radius=0)
     self.position_box.grid(row=5, column=0, rowspan=3, columnspan=4, sticky="nsew")
-    self.position_box.insert("0.0", "Position!\n" * 5)
+    self.position_box.insert("0.0", "no open positions")
 
     self.order_box = customtkinter.CTkTextbox(master=self, width=300, corner_radius=0)
     self.order_box.grid(row=8, column=0, rowspan=10, columnspan=4, sticky="nsew")
@@ -107,18 +107,35 @@ class TradingApp(TradingBackend):
   def cancel_order(self):
     print("cancel latest order")
 
+  def render_pnl(self):
+    self.position_box.delete("0.0", "end")
+    self.position_box.insert("0.0", "\n".join([self.live_pnl.render(), *self.broker_positions.drift_lines()]))
+
+  def render_orders(self):
+    self.order_box.delete("0.0", "end")
+    self.order_box.insert("0.0", "\n".join(repr(intent) for intent in self.order_dispatcher.recent()))
+
+  def render_status(self):
+    status = self.connection_status
+    self.title(f"Quick Trades ({status})" if status else "Quick Trades")
+
   def toggle_buy(self):
     state = "normal" if self.is_bid_greater_than_stop() else "disabled"
-    self.buy_button.configure(state=state)
+    self.set_state(self.buy_button, state)
 
   def toggle_sell(self):
     state = "normal" if self.is_ask_less_than_stop() else "disabled"
-    self.sell_button.configure(state=state)
+    self.set_state(self.sell_button, state)
 
   def toggle_exit(self):
     state = "normal" if self.is_in_position() else "disabled"
-    self.exit25.configure(state=state)
-    self.exit33.configure(state=state)
-    self.exit50.configure(state=state)
-    self.exit75.configure(state=state)
-    self.close_position.configure(state=state)
+    self.set_state(self.exit25, state)
+    self.set_state(self.exit33, state)
+    self.set_state(self.exit50, state)
+    self.set_state(self.exit75, state)
+    self.set_state(self.close_position, state)
+
+  @staticmethod
+  def set_state(widget, state: str):
+    if widget.cget("state") != state:
+      widget.configure(state=state)
@@ -1,21 +1,33 @@
-from collections import defaultdict
 import os
-from threading import Thread
-import time
-import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Thread
 import tkinter as tk
 import customtkinter
-from math import ceil
-from interface import Position, EnterAction, Quote, StopOrder
-from trade_history import Order, Trade, TradeHistory
-from web_signin import signin
+from datetime import datetime
+from interface import EnterAction, Quote
+from trade_history import Order, PositionChange, Trade, TradeHistory
+from decoding import decode_order, decode_position
+from http_client import ApiClient
+from order_latency import OrderLatency
+from symbol_cache import SymbolCache
+from token_manager import TokenManager
+from streaming import StreamingEngine
+from quote_subscriptions import QuoteSubscriptions
+from ui_updates import UIUpdateScheduler
+from startup_profile import startup_profile
+from stream_journal import StreamJournal
+from tick_buffer import TickBuffers
+from live_pnl import LivePnL
+from broker_positions import BrokerPositions
+from order_dispatcher import OrderDispatcher, OrderRejected
+from exit_engine import ExitEngine, OrderWatcher
+from event_log import event_log, parse_sampling
 
 client_id = os.environ["CLIENT_ID"]
 client_secret = os.environ["CLIENT_SECRET"]
 redirect_url = os.environ["REDIRECT_URL"]
 
-sigin_base_url = "https://signin.tradestation.com"
+sigin_base_url = os.environ.get("SIGNIN_URL", "https://signin.tradestation.com")
 signin_url = f"""\
 {sigin_base_url}/\
 authorize?\
@@ -26,7 +38,7 @@ response_type=code\
 &scope=openid offline_access MarketData ReadAccount Trade
 """
 
-api_url = "https://api.tradestation.com/v3" if os.environ["MODE"] == "LIVE" else "https://sim-api.tradestation.com/v3"
+api_url = os.environ.get("API_URL") or ("https://api.tradestation.com/v3" if os.environ["MODE"] == "LIVE" else "https://sim-api.tradestation.com/v3")
 
 encoded_headers = { "content-type": "application/x-www-form-urlencoded" }
 post_headers = lambda access_token: { "content-type": "application/json", "Authorization": f"Bearer {access_token}" }
@@ -35,49 +47,155 @@ get_headers = lambda access_token: {"Authorization": f"Bearer {access_token}"}
 class TradingBackend(customtkinter.CTk):
   def __init__(self):
     super().__init__()
-    self.access_token, self.refresh_token = self.get_tokens()
+    self.initialized = False
+    self.init_error: str = None
+    self.stopped = Event()
+    event_log.configure(os.environ.get("EVENT_LOG", os.path.join("logs", "events.log")), os.environ.get("LOG_LEVEL", "info"), os.environ.get("LOG_ECHO", "warning"), parse_sampling(os.environ.get("LOG_SAMPLING", "")))
+    event_log.start()
+    self.api = ApiClient(lambda: self.access_token, prewarm_url=f"{api_url}/orderexecution/routes")
+    self.token_manager = TokenManager(self.api, f"{sigin_base_url}/oauth/token", client_id, client_secret, redirect_url, signin_url, os.environ.get("REFRESH_TOKEN_FILE", "refresh_token"))
+    with startup_profile.phase("tokens"):
+      self.token_manager.start()
     print("live trading mode") if os.environ["MODE"] == "LIVE" else print("sim trading mode")
-    self.accounts = self.get_accounts()
-    self.tradeable_account_id = self.accounts["Margin"]["AccountID"]
-    self.positions: dict[str, Trade] = {}
-    # self.position_id_lookup: dict[str, str] = {}
+    self.accounts = {}
+    self.tradeable_account_id = None
+    self.ui_updates = UIUpdateScheduler(self, int(os.environ.get("UI_REFRESH_RATE", 30)))
+    self.ui_updates.register("quote", self.render_quote)
+    self.ui_updates.register("positions", self.toggle_exit)
+    self.ui_updates.register("pnl", self.render_pnl)
+    self.order_latency = OrderLatency()
+    self.order_dispatcher = OrderDispatcher(dedupe_window=float(os.environ.get("ORDER_DEDUPE_WINDOW", 1.0)), on_status=lambda _: self.ui_updates.mark_dirty("orders"))
+    self.ui_updates.register("orders", self.render_orders)
+    self.ui_updates.register("status", self.render_status)
+    self.symbol_cache = SymbolCache(self.fetch_symbol_info, os.environ.get("SYMBOL_CACHE", "symbol_cache.json"))
+    self.symbol_cache.prefetch(os.environ.get("WATCHLIST", "").split(","))
+    self.streaming = StreamingEngine()
+    if os.environ.get("JOURNAL_DIR"):
+      os.makedirs(os.environ["JOURNAL_DIR"], exist_ok=True)
+      self.streaming.journal = StreamJournal(os.path.join(os.environ["JOURNAL_DIR"], f"{datetime.now():%Y-%m-%d_%H%M%S}.streams.gz"))
     self.quotes: dict[str, Quote] = {}
+    self.quote_subscriptions = QuoteSubscriptions(self.streaming, self.quotes_url, self.headers, self.on_quote_message, self.quotes, int(os.environ.get("QUOTE_STREAMS", 1)))
     self.trade_history = TradeHistory()
+    self.positions: dict[str, Trade] = self.trade_history.positions
+    self.trade_history.subscribe(self.on_position_change)
+    self.order_watcher = OrderWatcher(self.trade_history)
+    self.exit_engine = ExitEngine(self.api, api_url, self.trade_history, self.order_watcher, self.order_latency)
+    self.broker_positions = BrokerPositions(float(os.environ.get("PNL_DRIFT_TOLERANCE", 1.0)))
+    self.drift_reported = False
+    self.tick_buffers = TickBuffers(int(os.environ.get("TICK_BUFFER_SIZE", 4096)))
+    self.live_pnl = LivePnL(self.quotes)
 
     self.set_input()
     self.start_streaming()
+    self.ui_updates.start()
+    self.after(1000, self.check_position_drift)
+    Thread(target=self.initialize, daemon=True).start()
+
+  def initialize(self, retry_delay=1, max_retry_delay=30):
+    attempts = 0
+    while not self.stopped.is_set():
+      attempts += 1
+      try:
+        self.load_accounts()
+        break
+      except Exception as e:
+        self.init_error = f"connect failed ({e}), retry in {retry_delay}s"
+        event_log.error("initialize_error", attempt=attempts, error=repr(e), retry_in=retry_delay)
+        self.ui_updates.mark_dirty("status")
+        if self.stopped.wait(retry_delay):
+          return
+        retry_delay = min(retry_delay * 2, max_retry_delay)
+    else:
+      return
+    self.resolve_current_symbol()
+    self.streaming.subscribe("positions", self.positions_url, self.headers, self.on_position_message, decode_position, self.on_positions_reconnect)
+    self.streaming.subscribe("orders", self.orders_url, self.headers, self.on_order_message, decode_order, self.on_orders_reconnect)
+    self.init_error = None
+    self.initialized = True
+    self.ui_updates.mark_dirty("status")
+    startup_profile.mark("initialized")
+
+  def load_accounts(self):
+    with ThreadPoolExecutor() as executor:
+      accounts = executor.submit(self.profile, "accounts", self.get_accounts)
+      symbol_info = executor.submit(self.profile, "symbol info", self.symbol_cache.get, self.current_symbol)
+      accounts = accounts.result()
+      if "Margin" not in accounts:
+        raise RuntimeError(f"no active Margin account in {sorted(accounts)}")
+      self.accounts = accounts
+      self.tradeable_account_id = accounts["Margin"]["AccountID"]
+      symbol_info.result()
+
+  @property
+  def connection_status(self):
+    if self.initialized:
+      return None
+    return self.init_error or "connecting"
+
+  @staticmethod
+  def profile(name: str, function, *args):
+    with startup_profile.phase(name):
+      return function(*args)
 
   def set_input(self):
     self.symbol = tk.StringVar(value="SPY")
-    self.current_symbol = self.symbol.get().upper()
+    self._current_symbol = self.symbol.get().upper()
+    self.update_live_symbols()
     self.stop_loss = tk.DoubleVar()
     self.risk = tk.IntVar(value=100)
     self.is_current_symbol_valid = True
 
   def start_streaming(self):
     self.enable_streaming = True
-    token_thread = Thread(target=self.run_refresh_token, daemon=True)
-    token_thread.start()
-    # positions_thread = Thread(target=self.stream_positions)
-    # positions_thread.start()
-    orders_thread = Thread(target=self.stream_orders)
-    orders_thread.start()
-    quotes_thread = Thread(target=self.stream_quotes)
-    quotes_thread.start()
+    self.api.start_prewarming()
+    self.streaming.start()
 
+  @property
+  def enable_streaming(self):
+    return self._enable_streaming
+
+  @enable_streaming.setter
+  def enable_streaming(self, enabled: bool):
+    self._enable_streaming = enabled
+    if not enabled:
+      self.shutdown()
+
+  def shutdown(self):
+    self.stopped.set()
+    self.shutdown_step("ui updates", self.ui_updates.stop)
+    self.shutdown_step("streams", self.streaming.stop)
+    self.shutdown_step("trade journal", self.write_trade_journal)
+    self.shutdown_step("latency report", self.order_latency.export, os.environ.get("LATENCY_REPORT", "order_latency.csv"))
+    if self.streaming.journal:
+      self.shutdown_step("stream journal", self.streaming.journal.close)
+    self.shutdown_step("tokens", self.token_manager.stop)
+    self.shutdown_step("order dispatcher", self.order_dispatcher.close)
+    self.shutdown_step("exit engine", self.exit_engine.close)
+    self.shutdown_step("api", self.api.close)
+    self.shutdown_step("trade history", print, self.trade_history)
+    self.shutdown_step("metrics", print, "quote streams", self.quote_subscriptions.metrics())
+    self.shutdown_step("metrics", print, "ui updates", self.ui_updates.metrics())
+    self.shutdown_step("metrics", print, "exits", self.exit_engine.metrics())
+    self.shutdown_step("event log", event_log.close)
+    self.shutdown_step("metrics", print, "event log", event_log.metrics())
 
   @staticmethod
-  def get_tokens():
-    auth_code = signin(signin_url)
-    
-    response_json = requests.post("https://signin.tradestation.com/oauth/token", data={
-      "grant_type": "authorization_code",
-      "client_id": client_id,
-      "client_secret": client_secret,
-      "code": auth_code,
-      "redirect_uri": redirect_url 
-    }, headers=encoded_headers).json()
-    return (response_json["access_token"], response_json["refresh_token"])
+  def shutdown_step(name: str, function, *args):
+    try:
+      function(*args)
+    except Exception as e:
+      event_log.error("shutdown_error", step=name, error=repr(e))
+
+  def write_trade_journal(self):
+    try:
+      from trade_journal import TradeJournal
+      TradeJournal(os.environ.get("TRADE_JOURNAL_DIR", "trade_journal")).write_day(self.trade_history)
+    except Exception as e:
+      event_log.error("trade_journal_error", error=repr(e))
+
+  @property
+  def access_token(self):
+    return self.token_manager.access_token
 
   def headers(self, content=None):
     if content == "encoded":
@@ -91,11 +209,10 @@ class TradingBackend(customtkinter.CTk):
       return {"Authorization": f"Bearer {self.access_token}"}
 
   def get_accounts(self):
-    print("getting accounts")
     accounts = {}
-    response_json = requests.get(f"{api_url}/brokerage/accounts", headers=self.headers()).json()
+    response_json = self.api.get(f"{api_url}/brokerage/accounts").json()
     for account in response_json["Accounts"]:
-      print(account)
+      event_log.info("account", account_id=account["AccountID"], account_type=account["AccountType"], status=account["Status"])
       if account["Status"] == "Active":
         accounts[account["AccountType"]] = account
     return accounts
@@ -112,8 +229,14 @@ class TradingBackend(customtkinter.CTk):
 
 
   def place_entry_order(self, enter_action: EnterAction):
-    price = self.quotes[self.current_symbol].ask if enter_action == "BUY" else self.quotes[self.current_symbol].bid
-    shares = int(self.risk.get() // abs(self.stop_loss.get() - price))
+    if not self.initialized:
+      event_log.warning("not_connected", action=enter_action, status=self.connection_status)
+      return
+    latency_ref = self.order_latency.start("Market")
+    symbol = self.current_symbol
+    price = self.quotes[symbol].ask if enter_action == "BUY" else self.quotes[symbol].bid
+    stop_price = self.stop_loss.get()
+    shares = int(self.risk.get() // abs(stop_price - price))
     payload = {
       "AccountID": self.tradeable_account_id,
       "TimeInForce": {
@@ -121,7 +244,7 @@ class TradingBackend(customtkinter.CTk):
       },
       "Quantity": str(shares),
       "OrderType": "Market",
-      "Symbol": self.current_symbol,
+      "Symbol": symbol,
       "TradeAction": enter_action,
       "Route": "Intelligent",
       "OSOs": [
@@ -135,91 +258,100 @@ class TradingBackend(customtkinter.CTk):
               },
               "Quantity": str(shares),
               "OrderType": "StopMarket",
-              "Symbol": self.current_symbol,
+              "Symbol": symbol,
               "TradeAction": "SELL" if enter_action == "BUY" else "BUYTOCOVER",
               "Route": "Intelligent",
-              "StopPrice": str(self.stop_loss.get())
+              "StopPrice": str(stop_price)
             }
           ]
         }
       ]
     }
-    response = requests.post(f"{api_url}/orderexecution/orders", json=payload, headers=self.headers("json"))
-    if response.status_code == 200:
-      response_json = response.json()
-      print(response_json)
-      if "Errors" in response_json:
-        print(response_json["Errors"])
-      for order in response_json["Orders"]:
-        print(order["Message"], order["OrderID"])
-        if "Error" in order: 
-          print(payload)
-    else:
-      print(response.status_code, response.text)
+    self.order_latency.mark(latency_ref, "payload")
+    key = f"entry:{symbol}:{enter_action}:{shares}:{stop_price}"
+    self.order_dispatcher.submit(key, symbol, f"{enter_action} {shares} {symbol} stop {stop_price}", lambda: self.send_entry_order(payload, latency_ref))
+
+  def send_entry_order(self, payload: dict, latency_ref: int = None):
+    self.order_latency.mark(latency_ref, "send")
+    response = self.api.post(f"{api_url}/orderexecution/orders", json=payload)
+    self.order_latency.mark(latency_ref, "response")
+    event_log.info("entry_order_response", symbol=payload["Symbol"], status=response.status_code, total_ms=response.total_ms, connect_ms=response.connect_ms, server_ms=response.server_ms)
+    if response.status_code != 200:
+      event_log.error("entry_order_rejected", symbol=payload["Symbol"], status=response.status_code, body=response.text)
+      raise OrderRejected(f"{response.status_code} {response.text}")
+    response_json = response.json()
+    if "Errors" in response_json:
+      event_log.error("entry_order_errors", symbol=payload["Symbol"], errors=response_json["Errors"])
+    for order in response_json["Orders"]:
+      event_log.info("entry_order", order_id=order["OrderID"], message=order["Message"])
+      self.order_latency.link(latency_ref, order["OrderID"])
+      if "Error" in order: 
+        event_log.error("entry_order_rejected", order_id=order["OrderID"], message=order["Message"], payload=payload)
+        raise OrderRejected(order["Message"])
+    return ", ".join(order["OrderID"] for order in response_json["Orders"])
 
   def place_exit_order(self, percent):
     def exit_order_callback():
-      if self.is_in_position():
-        current_shares = abs(self.positions[self.current_symbol].opened_shares)
-        shares_to_exit = ceil(int(current_shares) * percent)
-        shares_to_keep = current_shares - shares_to_exit
-        stop_order = self.trade_history.get_stop_order(self.current_symbol)
-        if stop_order and stop_order.status_description != 'Cancelled':
-          if shares_to_keep > 0:
-            stop_order_payload = {
-              "Quantity": str(shares_to_keep),
-              "OrderType": "StopMarket",
-              "StopPrice": str(stop_order.stop_price) 
-            }
-            print('modify stop order:', stop_order_payload)
-            response = requests.put(f"{api_url}/orderexecution/orders/{stop_order.order_id}", json=stop_order_payload, headers=self.headers('json'))
-          else:
-            response = requests.delete(f"{api_url}/orderexecution/orders/{stop_order.order_id}", headers=self.headers())
-          print(response.text)
-
-        exit_order_payload = {
-          "AccountID": self.tradeable_account_id,
-          "TimeInForce": {
-            "Duration": "DAY"
-          },
-          "Quantity": str(shares_to_exit),
-          "OrderType": "Market",
-          "Symbol": self.current_symbol,
-          "TradeAction": "BUYTOCOVER" if self.positions[self.current_symbol].side_factor == -1 else "SELL",
-          "Route": "Intelligent"
-        }
-        response = requests.post(f"{api_url}/orderexecution/orders", json=exit_order_payload, headers=self.headers("json"))
+      symbol = self.current_symbol
+      if not self.initialized:
+        event_log.warning("not_connected", action="exit", status=self.connection_status)
+      elif self.is_in_position():
+        latency_ref = self.order_latency.start("Market")
+        self.order_dispatcher.submit(f"exit:{symbol}:{percent}", symbol, f"exit {percent:.0%} {symbol}", lambda: self.exit_engine.exit(symbol, percent, self.tradeable_account_id, latency_ref))
       else:
-        print(f"not in any {self.current_symbol} position")
+        event_log.warning("no_position", symbol=symbol)
     return exit_order_callback
 
-  def stream_orders(self, retry=1):
-    if retry > 3:
-      print('retried 2 times. terminating...')
-      return
+  def orders_url(self):
+    return f"{api_url}/brokerage/stream/accounts/{self.get_account_ids()}/orders"
+
+  def on_order_message(self, order: Order):
+    # json_formatted_str = json.dumps(order.order_json, indent=2)
+    # print(json_formatted_str)
+    startup_profile.mark("first order message")
+    self.log_order(order)
+    self.order_latency.observe(order)
+    self.trade_history.append(order)
+    self.order_watcher.observe(order)
+    self.update_stop(order)
+
+  def on_orders_reconnect(self):
     try:
-      response = requests.get(f"{api_url}/brokerage/stream/accounts/{self.get_account_ids()}/orders", headers=self.headers(), stream=True)
-      for line in response.iter_lines():
-        if self.enable_streaming and line:
-          order_json = json.loads(line)
-          if "OrderID" in order_json:
-            # json_formatted_str = json.dumps(order_json, indent=2)
-            # print(json_formatted_str)
-            order = Order(order_json)
-            print(order)
-            self.trade_history.append(order)
-            self.positions = self.trade_history.get_positions()
-        else:
-          break
-      print(self.trade_history)
-      print("closing order stream")
-      response.close()
+      orders = self.fetch_orders()
+      positions = self.fetch_positions()
     except Exception as e:
-      print("error streaming orders", e)
-      e.with_traceback()
-      if response:
-        response.close()
-      self.stream_orders(retry + 1)
+      event_log.error("snapshot_error", stream="orders", error=repr(e))
+      return
+    self.streaming.run_in_stream("orders", lambda: self.apply_snapshot(orders, positions))
+
+  def fetch_orders(self):
+    response = self.api.get(f"{api_url}/brokerage/accounts/{self.get_account_ids()}/orders")
+    response.raise_for_status()
+    return [Order(order_json) for order_json in response.json()["Orders"]]
+
+  def fetch_positions(self):
+    response = self.api.get(f"{api_url}/brokerage/accounts/{self.get_account_ids()}/positions")
+    response.raise_for_status()
+    return response.json()["Positions"]
+
+  def apply_snapshot(self, orders: list[Order], positions: list[dict]):
+    applied = self.trade_history.apply_snapshot(orders)
+    for order in applied:
+      self.log_order(order)
+      self.order_latency.observe(order)
+      self.order_watcher.observe(order)
+      self.update_stop(order)
+    event_log.info("snapshot_applied", changed=len(applied), orders=len(orders), positions=len(positions))
+    self.apply_positions_snapshot(positions)
+
+  def update_stop(self, order: Order):
+    trade = self.positions.get(order.symbol)
+    if order.is_stop_order and trade is not None and self.live_pnl.update_stop(trade):
+      self.ui_updates.mark_dirty("pnl")
+
+  @staticmethod
+  def log_order(order: Order):
+    event_log.info("order", order_id=order.order_id, symbol=order.symbol, type=order.order_type, status=order.status_description, filled=order.execution_quantity, ordered=order.ordered_quantity, price=order.filled_price, stop=order.stop_price)
 
   @property
   def current_symbol(self):
@@ -228,66 +360,69 @@ class TradingBackend(customtkinter.CTk):
 
   @current_symbol.setter
   def current_symbol(self, symbol: str):
-    response = requests.get(f"{api_url}/marketdata/symbols/{symbol}", headers=self.headers())
-    json = response.json()
     self._current_symbol = symbol.upper()
-    if response.status_code == 200 and len(json["Errors"]) == 0:
-      self.symbol_info = json["Symbols"][0]
+    self.update_live_symbols()
+    self.resolve_current_symbol()
+
+  def resolve_current_symbol(self):
+    symbol_info = self.symbol_cache.get(self._current_symbol)
+    if symbol_info:
+      self.symbol_info = symbol_info
 
       asset_dict = {
         "STOCK": "Margin",
         "FUTURE": "Futures"
       }
-      account = self.accounts.get(asset_dict[self.symbol_info["AssetType"]])
+      account = self.accounts.get(asset_dict.get(self.symbol_info["AssetType"]))
       if account:
         self.is_current_symbol_valid = True
         if account["AccountID"] != self.tradeable_account_id:
-          print(f"switch to {account['AccountType']} account {account['AccountID']}")
+          event_log.info("account_switch", account_type=account["AccountType"], account_id=account["AccountID"])
         # quotes_thread = Thread(target=self.stream_quotes)
         # quotes_thread.start()
       else:
-        print("no account to trade the asset")
+        event_log.warning("no_account", symbol=self._current_symbol, asset_type=self.symbol_info["AssetType"])
         self.is_current_symbol_valid = False
     else:
-      print("not a valid symbol")
-      print(response.text)
       self.is_current_symbol_valid = False
 
+  def fetch_symbol_info(self, symbol: str):
+    response = self.api.get(f"{api_url}/marketdata/symbols/{symbol}")
+    json = response.json()
+    if response.status_code == 200 and len(json["Errors"]) == 0:
+      return json["Symbols"][0]
+    event_log.warning("invalid_symbol", symbol=symbol, status=response.status_code, body=response.text)
+    return None
 
-  def get_live_symbols(self) -> str:
+
+  def update_live_symbols(self):
     symbols = set(self.positions.keys())
     symbols.add(self.current_symbol)
-    return ",".join(sorted(symbols))
+    self.live_symbols = ",".join(sorted(symbols))
+    self.quote_subscriptions.update(symbols)
+    self.tick_buffers.retain(symbols)
 
-  def stream_quotes(self):
-    retry = 0
-    while retry < 3 and self.enable_streaming:
-      try:
-        symbols = self.get_live_symbols()
-        response = requests.get(f"{api_url}/marketdata/stream/quotes/{symbols}", headers=self.headers(), stream=True)
-        print(f"start streaming quotes for {symbols}", response.status_code)
-        for line in response.iter_lines():
-          if self.enable_streaming and line and symbols == self.get_live_symbols():
-            # print(self.current_symbol, line)
-            quote = json.loads(line)
-            symbol = quote.get("Symbol")
-            if symbol:
-              if symbol in self.quotes:
-                self.quotes[symbol].update_quote(quote)
-              else:
-                self.quotes[symbol] = Quote(quote)
-            self.toggle_buy()
-            self.toggle_sell()
-          else:
-            break
-        print(f"closing quote stream for {symbol}")
-        response.close()
-      except Exception as e:
-        print("error streaming quotes", e)
-        retry += 1
-        print('retry streaming quotes')
-        if response:
-          response.close()
+  def get_live_symbols(self) -> str:
+    return self.live_symbols
+
+  def on_position_change(self, change: PositionChange, symbol: str, trade: Trade):
+    event_log.info("position_change", symbol=symbol, change=change, shares=trade.opened_shares)
+    if change != "resized":
+      self.update_live_symbols()
+    self.live_pnl.rebuild(self.positions)
+    self.broker_positions.reconcile(symbol, self.positions.get(symbol))
+    self.ui_updates.mark_dirty("positions")
+    self.ui_updates.mark_dirty("pnl")
+
+  def quotes_url(self, symbols: str):
+    return f"{api_url}/marketdata/stream/quotes/{symbols}"
+
+  def on_quote_message(self, quote: Quote):
+    startup_profile.mark("first quote")
+    self.tick_buffers.append(quote)
+    self.ui_updates.mark_dirty("quote")
+    if self.live_pnl.update_quote(quote):
+      self.ui_updates.mark_dirty("pnl")
 
   def is_ask_less_than_stop(self):
     return True if self.current_symbol in self.quotes and self.quotes[self.current_symbol].ask < self.stop_loss.get() else False
@@ -295,68 +430,53 @@ class TradingBackend(customtkinter.CTk):
   def is_bid_greater_than_stop(self):
     return True if self.current_symbol in self.quotes and self.quotes[self.current_symbol].bid > self.stop_loss.get() else False
 
-  def stream_positions(self, retry=1):
-    if retry > 3:
-      print('retried 2 times. terminating...')
-      return
+  def positions_url(self):
+    return f"{api_url}/brokerage/stream/accounts/{self.get_account_ids()}/positions"
+
+  def on_position_message(self, position_json: dict):
+    symbol = self.broker_positions.apply(position_json)
+    if symbol:
+      self.broker_positions.reconcile(symbol, self.positions.get(symbol))
+      self.ui_updates.mark_dirty("pnl")
+
+  def on_positions_reconnect(self):
     try:
-      response = requests.get(f"{api_url}/brokerage/stream/accounts/{self.get_account_ids()}/positions", headers=self.headers(), stream=True)
-      print("start streaming positions", response.status_code)
-      for line in response.iter_lines():
-        if self.enable_streaming and line:
-          position_json = json.loads(line)
-
-          symbol_to_add = position_json.get("Symbol")
-          print("position", position_json)
-          if symbol_to_add:
-            position = Position(position_json)
-            self.positions[symbol_to_add] = position
-            self.position_id_lookup[position.position_id] = symbol_to_add
-          elif "Deleted" in position_json:
-            print(position_json)
-            # symbol_to_delete = self.position_id_lookup[position_json["PositionID"]]
-            # print(f"deleting {symbol_to_delete} position")
-            # self.positions.pop(symbol_to_delete, None)
-          else:
-            # print("position", position)
-            pass
-          self.toggle_exit()
-        else:
-          break
-      print(f"closing positions stream")
-      response.close()
+      positions = self.fetch_positions()
     except Exception as e:
-      print("error streaming positions", e)
-      if response:
-        response.close()
-      self.stream_positions(retry + 1)
+      event_log.error("snapshot_error", stream="positions", error=repr(e))
+      return
+    self.streaming.run_in_stream("positions", lambda: self.apply_positions_snapshot(positions))
+
+  def apply_positions_snapshot(self, positions: list[dict]):
+    self.broker_positions.replace(positions)
+    self.broker_positions.reconcile_all(self.positions)
+    self.ui_updates.mark_dirty("pnl")
+
+  def check_position_drift(self):
+    drift_reported = bool(self.broker_positions.report_drift())
+    if drift_reported or self.drift_reported:
+      self.ui_updates.mark_dirty("pnl")
+    self.drift_reported = drift_reported
+    if self.enable_streaming:
+      self.after(1000, self.check_position_drift)
 
   def is_in_position(self):
     return True if self.current_symbol in self.positions else False
 
 
-  def run_refresh_token(self):
-    try:
-      print("start interval task to refresh token")
-      while self.enable_streaming:
-        time.sleep(900)
-        print("refreshing token...")
-        response = requests.post("https://signin.tradestation.com/oauth/token", data={
-          "grant_type": "refresh_token",
-          "client_id": client_id,
-          "client_secret": client_secret,
-          "refresh_token": self.refresh_token
-        }, headers=self.headers("encoded"))
-        if response.status_code == 200:
-          print("token refreshed")
-        else:
-          print("token refresh failed")
-          print(response.status_code, response.text)
-        self.access_token = response.json()["access_token"]
-    except Exception as e:
-      print("error refreshing token", e)
+  def render_quote(self):
+    self.toggle_buy()
+    self.toggle_sell()
+
+  def render_pnl(self):
+    pass
+
+  def render_orders(self):
+    pass
+
+  def render_status(self):
+    pass
 
-  
   def toggle_buy(self):
     pass
 
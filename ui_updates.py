@@ -0,0 +1,51 @@
+from threading import Lock
+from typing import Callable
+import tkinter as tk
+
+from event_log import event_log
+
+
+class UIUpdateScheduler:
+  def __init__(self, root: tk.Misc, refresh_rate=30):
+    self.root = root
+    self.interval = max(1, 1000 // refresh_rate)
+    self.renderers: dict[str, Callable[[], None]] = {}
+    self.dirty: set[str] = set()
+    self.lock = Lock()
+    self.messages_received = 0
+    self.frames_rendered = 0
+    self.running = False
+
+  def register(self, key: str, render: Callable[[], None]):
+    self.renderers[key] = render
+
+  def mark_dirty(self, key: str):
+    with self.lock:
+      self.dirty.add(key)
+      self.messages_received += 1
+
+  def start(self):
+    self.running = True
+    self.root.after(self.interval, self.pump)
+
+  def stop(self):
+    self.running = False
+
+  def pump(self):
+    with self.lock:
+      dirty, self.dirty = self.dirty, set()
+    if dirty:
+      for key in dirty:
+        try:
+          self.renderers[key]()
+        except Exception as e:
+          event_log.error("render_error", key=key, error=repr(e))
+      self.frames_rendered += 1
+    if self.running:
+      self.root.after(self.interval, self.pump)
+
+  def metrics(self):
+    return {
+      "messages_received": self.messages_received,
+      "frames_rendered": self.frames_rendered
+    }